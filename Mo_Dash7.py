@@ -1,7 +1,16 @@
 import streamlit as st
-import gspread
 from oauth2client.service_account import ServiceAccountCredentials
-from sellcell_data import get_all_devices, get_sellcell_price
+from sellcell_data import start_catalog_watcher
+from device_search import search_devices
+from price_prefetch import prefetch_max_price, wait_for_price
+from submission_queue import start_flusher, submit_row
+from sheets_pool import get_pool
+from prolific_index import get_prolific_index
+from session_store import get_session_store, new_session_token
+from content import (
+    URLS, UNABLE_TO_WIPE, UNLISTED_MODEL, decision_options, device_os, step2_blocks, step3_blocks,
+)
+import metrics
 
 # Force page scroll to top on rerun
 st.markdown("""
@@ -24,333 +33,207 @@ st.markdown(
 # -------------------------------
 # Google Sheets helper
 # -------------------------------
-def get_google_sheet(sheet_name):
+def get_google_credentials():
     scope = ["https://spreadsheets.google.com/feeds",
              "https://www.googleapis.com/auth/drive"]
     sa_info = st.secrets["google_service_account"]
-    creds = ServiceAccountCredentials.from_json_keyfile_dict(sa_info, scope)
-    client = gspread.authorize(creds)
-    sheet = client.open(sheet_name).sheet1
-    return sheet
+    return ServiceAccountCredentials.from_json_keyfile_dict(sa_info, scope)
+
+@metrics.timed("sheets_get_worksheet")
+def get_google_sheet(sheet_name):
+    # Authorized client and worksheet are pooled per process
+    return get_pool(get_google_credentials).worksheet(sheet_name)
+
+# What to do when a Prolific ID submits again (e.g. after a timeout refresh):
+# "reject" keeps the first row, "upsert" replaces it with the latest answers
+DUPLICATE_POLICY = "reject"
+
+def save_to_google_sheet(prolific_id, device, decision, working, upsert=False):
+    # Spooled locally and appended in batches by a background thread
+    submit_row([prolific_id, device, decision, working], upsert_key=prolific_id if upsert else None)
+    st.success("✅ Data saved!")
+
+
+def render_blocks(blocks, **values):
+    # Blocks come pre-joined from content.py; only the placeholders vary per session
+    for kind, text in blocks:
+        for name, value in values.items():
+            text = text.replace("{" + name + "}", str(value))
+        if kind == "markdown":
+            st.markdown(text, unsafe_allow_html=True)
+        elif kind == "info":
+            st.info(text)
+        else:
+            st.warning(text)
 
-def save_to_google_sheet(prolific_id, device, decision, working):
-    sheet = get_google_sheet("ProlificIDs")
-    sheet.append_row([prolific_id, device, decision, working])
-    st.success("✅ Data saved to Google Sheet!")
+
+metrics.start_exporters()
+start_catalog_watcher()
+start_flusher(lambda: get_google_sheet("ProlificIDs"))
+prolific_index = get_prolific_index(lambda: get_google_sheet("ProlificIDs"))
 
 
 # -------------------------------
 # Session state
 # -------------------------------
-if "step" not in st.session_state:
-    st.session_state.step = 0
-if "device" not in st.session_state:
-    st.session_state.device = None
-if "working" not in st.session_state:
-    st.session_state.working = None
-if "decision" not in st.session_state:
-    st.session_state.decision = None
-if "wipe_done" not in st.session_state:
-    st.session_state.wipe_done = False
-if "links_done" not in st.session_state:
-    st.session_state.links_done = False
-if "unable_to_wipe_message" not in st.session_state:
-    st.session_state.unable_to_wipe_message = False
-if "prolific_id" not in st.session_state:
-    st.session_state.prolific_id = None
-
-
-#st.title("♻️ Hi, I'm Mo - The Sustainable Electronics Assistant")
-
-if st.session_state.step == 0:
-    st.title("♻️ Hi, I'm Mo - The Sustainable Electronics Assistant")
-else:
-    st.markdown("### ♻️ Hi, I'm Mo - The Sustainable Electronics Assistant")
+SESSION_DEFAULTS = {
+    "step": 0,
+    "device": None,
+    "working": None,
+    "decision": None,
+    "wipe_done": False,
+    "links_done": False,
+    "unable_to_wipe_message": False,
+    "prolific_id": None,
+    # (device, future) from the speculative price lookup
+    "price_prefetch": None,
+}
+for key, value in SESSION_DEFAULTS.items():
+    st.session_state.setdefault(key, value)
+
+# Progress is mirrored to a shared store under a token carried in the URL, so a
+# refresh (or a request landing on another worker) resumes where it left off
+PERSISTED_KEYS = [key for key in SESSION_DEFAULTS if key != "price_prefetch"]
+session_store = get_session_store()
+
+if "session_token" not in st.session_state:
+    token = st.query_params.get("PROLIFIC_PID") or st.query_params.get("session")
+    if not token:
+        token = new_session_token()
+        st.query_params["session"] = token
+    st.session_state.session_token = token
+    saved = session_store.load(token)
+    if saved:
+        for key in PERSISTED_KEYS:
+            if key in saved:
+                st.session_state[key] = saved[key]
+
+
+# -------------------------------
+# Step transitions
+# -------------------------------
+# Buttons change state in on_click callbacks, which run before the rerun they
+# trigger, so a step change renders once instead of render → st.rerun() → render.
+def go(**updates):
+    for key, value in updates.items():
+        st.session_state[key] = value
+
+
+def confirm_device():
+    device = st.session_state.get("device_choice")
+    if device:
+        # Look the price up while the participant answers step 1
+        go(device=device, step=1, price_prefetch=(device, prefetch_max_price(device)))
+
+
+def confirm_decision():
+    updates = {"decision": st.session_state.decision_choice, "step": 3}
+    if st.session_state.working != "Yes":
+        updates.update(unable_to_wipe_message=True, wipe_done=False)
+    go(**updates)
+
+
+def current_step() -> str:
+    state = st.session_state
+    if state.prolific_id is not None:
+        return "done"
+    if state.step == 3 and not state.wipe_done:
+        return "unable_to_wipe" if state.unable_to_wipe_message else "wipe"
+    if state.step == 3 and not state.links_done:
+        return "links"
+    return {0: "device", 1: "working", 2: "options", 4: "submit"}[state.step]
 
 
 # -------------------------------
 # Step 0: Device selection
 # -------------------------------
-if st.session_state.step == 0:
+def step_device():
     st.markdown("Hello and welcome! I am Mo, your guide for making sustainable choices with smartphones you no longer use at home. We will work together to find the best option, whether that is reselling, donating, or recycling your device. If you experience a timeout, just refresh the page. **You will be done when all your questions are answered and you have entered your Prolific ID.**")
-    devices = sorted(get_all_devices())
     st.markdown("📱To get started, could you tell me about a smartphone that you are no longer using?")
-    device_choice = st.selectbox("You can start typing the model of the smartphone, e.g. iPhone SE or Samsung Galaxy, etc.", [""] + devices)
-    
+    # Search runs server-side so the picker only ships the matching models;
+    # a new query drops the old pick so the first match is preselected again
+    device_query = st.text_input(
+        "You can start typing the model of the smartphone, e.g. iPhone SE or Samsung Galaxy, etc.",
+        on_change=lambda: st.session_state.pop("device_choice", None),
+    )
+    matches = search_devices(device_query, k=25) if device_query else []
+    st.selectbox("Select your model:", [""] + matches, index=1 if matches else 0, key="device_choice")
+
     col1, col2 = st.columns(2)
     with col1:
-        if st.button("Confirm Device") and device_choice != "":
-            st.session_state.device = device_choice
-            st.session_state.step = 1
-            st.rerun()
+        st.button("Confirm Device", on_click=confirm_device)
     with col2:
-        if st.button("📵 Model unknown or not listed"):
-            st.session_state.device = "Unlisted Model"
-            st.session_state.step = 1
-            st.rerun()
+        st.button("📵 Model unknown or not listed", on_click=go, kwargs={"device": UNLISTED_MODEL, "step": 1})
 
 
 # -------------------------------
 # Step 1: Working / Not working
 # -------------------------------
-elif st.session_state.step == 1:
-    if st.button("⬅️ Back"):
-        st.session_state.step = 0
-        st.rerun()
+def step_working():
+    st.button("⬅️ Back", on_click=go, kwargs={"step": 0})
 
     st.write(f"🔋 Does your **{st.session_state.device}** power on and does the battery last for daily use?")
-    working_choice = st.radio("Select one:", ["Yes", "No/I do not know"], index=0)
+    st.radio("Select one:", ["Yes", "No/I do not know"], index=0, key="working_choice")
 
-    if st.button("Continue") and working_choice:
-        st.session_state.working = working_choice
-        st.session_state.step = 2
-        st.rerun()
+    st.button("Continue", on_click=lambda: go(working=st.session_state.working_choice, step=2))
 
 
 # -------------------------------
 # Step 2: Resale/Donate/Recycle info
 # -------------------------------
-elif st.session_state.step == 2:
-    if st.button("⬅️ Back"):
-        st.session_state.step = 1
-        st.rerun()
+def step_options():
+    st.button("⬅️ Back", on_click=go, kwargs={"step": 1})
 
     device = st.session_state.device
     working = st.session_state.working
-
-    # Special case for unlisted device
-    if device == "Unlisted Model" and working == "Yes":
-        st.warning("📵 Because the model is needed to resell the phone, your options are Donate or Recycle.")
-
-    # Working → try resale price
-    if working == "Yes" and device != "Unlisted Model":
-        conditions = ["Mint", "Good", "Fair", "Poor"]
-        max_price = 0
-        for cond in conditions:
-            try:
-                price_data = get_sellcell_price(device, cond)
-                if price_data and price_data.get("price") and price_data["price"] > max_price:
-                    max_price = price_data["price"]
-            except Exception:
-                continue
-
-        #if max_price > 0:
-            #st.markdown(f"💰 Your **{device}** can fetch up to **${max_price}** on resale!")
-        #    st.markdown(f"<p style='font-size: 30x;'>💰 Your {device} can fetch up to ${max_price} on resale!</p>", unsafe_allow_html=True)
-            
-        #else:
-        #    st.info(f"ℹ️ Could not find resale price for {device}.")
-    #else:
-    #    st.info("⚠️ If your device is not working, resale or donation may not be possible.")
-
-    st.markdown("### 💡 Here are your options:")
-
-    show_resell = False
-    show_resell_no_model = False
-    show_donate = False
-
-    if working == "Yes" and device != "Unlisted Model":
-        show_resell = True
-        show_donate = True
-    elif device == "Unlisted Model" and working == "Yes":
-        show_resell = False
-        show_donate = True
-    elif device == "Unlisted Model" and working != "Yes":
-        show_resell = False
-        show_donate = False
-    else:
-        show_resell_no_model = True
-        show_donate = False
-
-    if show_resell:
-        st.markdown("**Resell:** You could earn some cash by selling your old phone.")
-        if max_price > 0:
-            #st.markdown(f"💰 Your **{device}** can fetch up to **${max_price}** on resale!")
-            st.markdown(f"<p style='font-size: 30x;'>💰 Your {device} can fetch up to ${max_price} on resale!</p>", unsafe_allow_html=True)
-            
-        else:
-            st.info(f"ℹ️ Could not find resale price for {device}.")
-        st.markdown( f"**It's easy to resell, either vendor will send you a box with prepaid postage.**")
-        st.markdown(
-            f"Try the following websites to get an estimate of your smartphone's current worth:  \n"
-            f'- [BackMarket](https://www.backmarket.com/en-us/buyback/home) -  This link leads to site to get a quote to sell your smartphone to BackMarket \n'
-            f'- [Gazelle](https://www.gazelle.com/trade-in?_gl=1*1qgg1ts*_gcl_aw*R0NMLjE3NTc3MDA4NDguQ2p3S0NBandpWV9HQmhCRUVpd0FGYWdodnJrRElUenlqZ3M1QkU5YmJRd2JtTFRFNkxSNWc0SkJCdDhleXJXakU3emFPOXlMV2VHN01Sb0MxSThRQXZEX0J3RQ..*_gcl_au*NTk2NzI0NDQ3LjE3NTc3MDA4MzQuMzAwODg2NTE0LjE3NTgyMzExMjEuMTc1ODIzMTEyMQ..*_ga*MTU5NTIxODU5Mi4xNzQ1OTUxMjYw*_ga_6918GRRZ0Y*czE3NjM2NjE0MDIkbzYkZzEkdDE3NjM2NjE0MDQkajU3JGwwJGgxMTc4NzE4Mzg0) - This link leads to site to get a quote to sell your smartphone to Gazelle \n'
-        )
-        st.markdown("Upon receiving the phone, the vendor will check battery condition, if it turns on, and if data has been wiped. If there are issues, they will likely adjust the offered price")
-        
-
-    if show_donate:
-        st.markdown(
-            f"**Donate:** Your used phone may not fetch a high price, but if still working and holding a charge, donating gives it a new life. "
-            f"You can try donating your device, for example at:  \n"
-            f"- [Goodwill](https://www.google.com/maps/search/Goodwill+near+me) - This link shows the Google Map of nearby Goodwill locations. They accept working electronics at all locations\n"
-            f"- [Salvation Army](https://www.google.com/maps/search/Salvation+Army+near+me) - This link shows the Google Map of nearby Salvation Army locations, where electronics donations are accepted"
-        )
-
-    st.markdown(
-        f"**Recycle:** If your phone does not work or if you do not want to resell or donate, you can bring it for recycling, for example at:  \n"
-        f"- [Best Buy](https://www.google.com/maps/search/BestBuy+near+me)  – This link shows the Google Map of nearby BestBuy locations. Free electronics recycling is available at all stores"
+    listed = device != UNLISTED_MODEL
+
+    max_price, price_present = 0, False
+    if listed and working == "Yes":
+        # Normally already resolved by the prefetch started at "Confirm Device"
+        prefetch = st.session_state.get("price_prefetch")
+        if prefetch is None or prefetch[0] != device:
+            prefetch = (device, prefetch_max_price(device))
+            st.session_state.price_prefetch = prefetch
+        price, ready = wait_for_price(prefetch[1])
+        max_price = price or 0
+        price_present = max_price > 0 if ready else None
+    render_blocks(step2_blocks(listed, working == "Yes", price_present), device=device, price=max_price)
+
+    st.radio(
+        "What option would you like to explore for your device?",
+        decision_options(listed, working == "Yes"),
+        key="decision_choice",
     )
-    st.markdown(f"There is usually a bin near Customer Service for dropping in your consumer electronics.")
-
-    if show_resell_no_model:
-        st.markdown("**Resell:** You could earn some cash by selling your old phone.")
-        #if max_price > 0:
-            #st.markdown(f"💰 Your **{device}** can fetch up to **${max_price}** on resale!")
-        #    st.markdown(f"<p style='font-size: 30x;'>💰 Your {device} can fetch up to ${max_price} on resale!</p>", unsafe_allow_html=True)
-            
-        #else:
-        #    st.info(f"ℹ️ Could not find resale price for {device}.")
-        st.markdown( f"**It's easy to resell, either vendor will send you a box with prepaid postage.**")
-        st.markdown(
-            f"Try the following websites to get an estimate of your smartphone's current worth:  \n"
-            f'- [BackMarket](https://www.backmarket.com/en-us/buyback/home) -  This link leads to site to get a quote to sell your smartphone to BackMarket \n'
-            f'- [Gazelle](https://www.gazelle.com/trade-in?_gl=1*1qgg1ts*_gcl_aw*R0NMLjE3NTc3MDA4NDguQ2p3S0NBandpWV9HQmhCRUVpd0FGYWdodnJrRElUenlqZ3M1QkU5YmJRd2JtTFRFNkxSNWc0SkJCdDhleXJXakU3emFPOXlMV2VHN01Sb0MxSThRQXZEX0J3RQ..*_gcl_au*NTk2NzI0NDQ3LjE3NTc3MDA4MzQuMzAwODg2NTE0LjE3NTgyMzExMjEuMTc1ODIzMTEyMQ..*_ga*MTU5NTIxODU5Mi4xNzQ1OTUxMjYw*_ga_6918GRRZ0Y*czE3NjM2NjE0MDIkbzYkZzEkdDE3NjM2NjE0MDQkajU3JGwwJGgxMTc4NzE4Mzg0) - This link leads to site to get a quote to sell your smartphone to Gazelle \n'
-        )
-        st.markdown("Upon receiving the phone, the vendor will check battery condition, if it turns on, and if data has been wiped. If there are issues, they will likely adjust the offered price")
-
-    # Choices
-    if working == "Yes" and device != "Unlisted Model":
-        decision_options = ["Resell", "Donate", "Recycle"]
-    elif device == "Unlisted Model" and working == "Yes":
-        decision_options = ["Donate","Recycle"]
-    elif device == "Unlisted Model" and working != "Yes":
-        decision_options = ["Recycle"]
-    else:
-        decision_options = ["Resell", "Recycle"]
-
-    decision_choice = st.radio("What option would you like to explore for your device?", decision_options)
-
-    if st.button("Confirm Choice") and decision_choice:
-        st.session_state.decision = decision_choice
-
-        if working != "Yes":
-            st.session_state.unable_to_wipe_message = True
-            st.session_state.wipe_done = False
-            st.session_state.step = 3
-            st.rerun()
-
-        st.session_state.step = 3
-        st.rerun()
+    st.button("Confirm Choice", on_click=confirm_decision)
 
 
 # -------------------------------
 # Step 3: Wipe instructions
 # -------------------------------
-elif st.session_state.step == 3 and not st.session_state.wipe_done:
-
-    if st.session_state.unable_to_wipe_message:
+def step_unable_to_wipe():
+    st.button("⬅️ Back", on_click=go, kwargs={"unable_to_wipe_message": False, "step": 2})
+    render_blocks([UNABLE_TO_WIPE])
+    st.button("✅ I understand", on_click=go, kwargs={"wipe_done": True})
 
-        if st.button("⬅️ Back"):
-            st.session_state.unable_to_wipe_message = False
-            st.session_state.step = 2
-            st.rerun()
-
-        st.warning(
-            "⚠️ Sometimes it becomes too difficult or impossible to erase your data. "
-            "The phone may be non-functional. In these situations, you will have to decide for yourself "
-            "if you feel comfortable recycling or reselling phones."
-        )
 
-        if st.button("✅ I understand"):
-            st.session_state.wipe_done = True
-            st.rerun()
+def step_wipe():
+    st.button("⬅️ Back", on_click=go, kwargs={"step": 2})
 
-        st.stop()
-
-    if st.button("⬅️ Back"):
-        st.session_state.step = 2
-        st.rerun()
-
-    device = st.session_state.device
-    decision = st.session_state.decision
-
-    #st.markdown(f"🔒 Before you {decision.lower()} your device, please be sure to wipe your data")
-    st.markdown(f"<p style='font-size: 36x;'>🔒 Before you {decision.lower()} your device, please be sure to wipe your data</p>", unsafe_allow_html=True)
-    #st.markdown(f"To remove data, see this guide:")
-
-    if device == "Unlisted Model":
-        #st.markdown("#### For iPhones (iOS), this means disabling Find My on your device and then wiping it:")
-        st.markdown("#### For iPhones (iOS), this means:")
-        #st.markdown(f"Smart phones are usually linked to a user's account, it cannot be used by someone else unless you remove it from list of devices owned.")
-        #st.markdown(f"To remove the smartphone from your list of devices, see this link:")
-        st.markdown(
-            "- Step 1: Remove device from Find My: [Apple Guide](https://support.apple.com/guide/icloud/remove-devices-and-items-from-find-my-mmdc23b125f6/icloud)\n"
-        )
-        st.markdown(f"All your Apple devices are registered with your account, no one else will be able to use the smartphone unless you deregister it. For iPhones (iOS), this means disabling Find My on your device.")
-        st.markdown(
-            "- Step 2: Erase All Content and Settings: [Erase iPhone Guide](https://support.apple.com/guide/iphone/erase-iphone-iph7a2a9399b/ios)")
-        st.markdown(f"This will involve selecting “Erase all Content and Settings” in the General section of the Settings app.")
-       
-        #st.markdown("#### For Android phones, this means removing the device from your Google account and then wiping it:")
-        st.markdown("#### For Android phones, this means:")
-        #st.markdown(f"Smartphones are usually linked to a user's account, it cannot be used by someone else unless you remove it from list of devices owned.")
-        #st.markdown(f"To remove the smartphone from your list of devices, see this link:")
-        st.markdown(
-            "- Step 1: Removing smartphone from account: [Android Guide](https://support.google.com/accounts/answer/81987?hl=en&co=GENIE.Platform%3DAndroid)\n"
-        )
-        st.markdown("Your smartphone is linked to your Google account, and no one else can use it unless you remove it from your list of devices.")
-        st.markdown(
-            "- Step 2: Erase All Content and Settings: [Erase Android Guide](https://support.google.com/android/answer/6088915?hl=en)"
-        )
-       
-        
-    else:
-        os_type = "ios" if "iphone" in device.lower() else "android"
-        if os_type == "ios":
-            #st.markdown("#### For iPhones (iOS), this means disabling Find My on your device and then wiping it:")
-            st.markdown("#### For iPhones (iOS), this means:")
-            #st.markdown(f"Smart phones are usually linked to a user's account, it cannot be used by someone else unless you remove it from list of devices owned.")
-            #st.markdown(f"To remove the smartphone from your list of devices, see this link:")
-            st.markdown(
-            "- Step 1: Remove device from Find My: [Apple Guide](https://support.apple.com/guide/icloud/remove-devices-and-items-from-find-my-mmdc23b125f6/icloud)\n")
-            st.markdown(f"All your Apple devices are registered with your account, no one else will be able to use the smartphone unless you deregister it. For iPhones (iOS), this means disabling Find My on your device.")
-            st.markdown(
-            "- Step2: Erase All Content and Settings: [Erase iPhone Guide](https://support.apple.com/guide/iphone/erase-iphone-iph7a2a9399b/ios)")
-            st.markdown(f"This will involve selecting “Erase all Content and Settings” in the General section of the Settings app.")
-           
-        else:
-            #st.markdown("#### For Android phones, this means removing the device from your Google account and then wiping it:")
-            st.markdown("#### For Android phones, this means:")
-            #st.markdown(f"Smart phones are usually linked to a user's account, it cannot be used by someone else unless you remove it from list of devices owned.")
-            #st.markdown(f"To remove the smartphone from your list of devices, see this link:")
-            st.markdown(
-            "- Step 1: Removing smartphone from account: [Android Guide](https://support.google.com/accounts/answer/81987?hl=en&co=GENIE.Platform%3DAndroid)\n")
-            st.markdown("Your smartphone is linked to your Google account, and no one else can use it unless you remove it from your list of devices.")
-            st.markdown(
-            "- Step 2: Erase All Content and Settings: [Erase Android Guide](https://support.google.com/android/answer/6088915?hl=en)")
-            
+    render_blocks(step3_blocks(device_os(st.session_state.device)), decision=st.session_state.decision.lower())
 
     col1, col2 = st.columns(2)
     with col1:
-        if st.button("✅ I've wiped my device"):
-            st.session_state.wipe_done = True
-            st.rerun()
+        st.button("✅ I've wiped my device", on_click=go, kwargs={"wipe_done": True})
     with col2:
-        if not st.session_state.unable_to_wipe_message:
-            if st.button("⚠️ I was unable to wipe"):
-                st.session_state.unable_to_wipe_message = True
-                st.rerun()
-
-    if st.session_state.unable_to_wipe_message:
-        st.warning(
-            "⚠️ Sometimes it becomes too difficult or impossible to erase your data. "
-            "The phone may be non-functional. In these situations, you will have to decide for yourself "
-            "if you feel comfortable recycling or reselling phones."
-        )
-        if st.button("✅ I understand"):
-            st.session_state.wipe_done = True
-            st.rerun()
+        st.button("⚠️ I was unable to wipe", on_click=go, kwargs={"unable_to_wipe_message": True})
 
 
 # -------------------------------
 # Step 4: Show decision-specific links
 # -------------------------------
-elif st.session_state.step == 3 and st.session_state.wipe_done and not st.session_state.links_done:
-    if st.button("⬅️ Back"):
-        st.session_state.step = 3
-        st.session_state.wipe_done = False
-        st.rerun()
+def step_links():
+    st.button("⬅️ Back", on_click=go, kwargs={"step": 3, "wipe_done": False})
 
     device = st.session_state.device
     decision = st.session_state.decision
@@ -359,7 +242,7 @@ elif st.session_state.step == 3 and st.session_state.wipe_done and not st.sessio
 
     if decision == "Resell":
         st.markdown(
-            f"- Resell your **{device}**: [BackMarket](https://www.backmarket.com/en-us/buyback/home), [Gazelle](https://www.gazelle.com/trade-in?_gl=1*1qgg1ts*_gcl_aw*R0NMLjE3NTc3MDA4NDguQ2p3S0NBandpWV9HQmhCRUVpd0FGYWdodnJrRElUenlqZ3M1QkU5YmJRd2JtTFRFNkxSNWc0SkJCdDhleXJXakU3emFPOXlMV2VHN01Sb0MxSThRQXZEX0J3RQ..*_gcl_au*NTk2NzI0NDQ3LjE3NTc3MDA4MzQuMzAwODg2NTE0LjE3NTgyMzExMjEuMTc1ODIzMTEyMQ..*_ga*MTU5NTIxODU5Mi4xNzQ1OTUxMjYw*_ga_6918GRRZ0Y*czE3NjM2NjE0MDIkbzYkZzEkdDE3NjM2NjE0MDQkajU3JGwwJGgxMTc4NzE4Mzg0)"
+            f"- Resell your **{device}**: [BackMarket]({URLS['backmarket']}), [Gazelle]({URLS['gazelle']})"
         )
         st.markdown(f"By clicking on one of the above websites:")
         #st.markdown(f"You will be prompted to choose the model of your smartphone and provide information on memory and condition. They will offer a selling price, if you accept they will send you a prepaid box for you to ship your smartphone to them. After receiving, they check the phone's functionality, condition, and if the smartphone has been removed from your user account. They might modify the offer after this. If you accept the offer you will get paid, if you do not, they will ship the phone back to you.")
@@ -371,41 +254,46 @@ elif st.session_state.step == 3 and st.session_state.wipe_done and not st.sessio
             f"- After receiving, they check the phone's functionality, condition, and if the smartphone has been removed from your user account. They might modify the offer after this.")
         st.markdown(
             f"- If you accept the offer, you will get paid. If you do not, they will ship the phone back to you.")
-        
 
     elif decision == "Donate":
         st.markdown(
             f"- Donate your **{device}**: "
-            f"[Goodwill near me](https://www.google.com/maps/search/Goodwill+near+me), "
-            f"[Salvation Army near me](https://www.google.com/maps/search/Salvation+Army+near+me)"    
+            f"[Goodwill near me]({URLS['goodwill']}), "
+            f"[Salvation Army near me]({URLS['salvation_army']})"
         )
         st.markdown("You can drop off the smartphone at locations such as the above links. They will likely give you a tax deduction form.")
 
     elif decision == "Recycle":
         st.markdown(
-            f"- Recycle your **{device}**: [BestBuy near me](https://www.google.com/maps/search/BestBuy+near+me) - This link shows BestBuy locations close to you."
+            f"- Recycle your **{device}**: [BestBuy near me]({URLS['bestbuy']}) - This link shows BestBuy locations close to you."
         )
         st.markdown("You can usually find the recycle bin next to the customer service counter.")
 
-    if st.button("✅ Done viewing links"):
-        st.session_state.links_done = True
-        st.session_state.step = 4
-        st.rerun()
+    st.button("✅ Done viewing links", on_click=go, kwargs={"links_done": True, "step": 4})
 
 
 # -------------------------------
 # Step 5: Prolific ID submission
 # -------------------------------
-elif st.session_state.step == 4 and st.session_state.prolific_id is None:
+def step_submit():
     prolific_id_input = st.text_input("🎯 Please enter your Prolific ID and press Enter to finish:")
 
     if prolific_id_input:
-        save_to_google_sheet(
-            prolific_id_input,
-            st.session_state.device,
-            st.session_state.decision,
-            st.session_state.working,
-        )
+        # Reserved atomically across workers; given back if queueing fails so the participant can retry
+        is_new = prolific_index.add(prolific_id_input)
+        if is_new or DUPLICATE_POLICY == "upsert":
+            try:
+                save_to_google_sheet(
+                    prolific_id_input,
+                    st.session_state.device,
+                    st.session_state.decision,
+                    st.session_state.working,
+                    upsert=not is_new,
+                )
+            except Exception:
+                if is_new:
+                    prolific_index.discard(prolific_id_input)
+                raise
         st.session_state.prolific_id = prolific_id_input
         st.success(
             f"🎉 Thank you! Your Prolific ID **{prolific_id_input}** has been recorded. Have a sustainable day!"
@@ -415,5 +303,40 @@ elif st.session_state.step == 4 and st.session_state.prolific_id is None:
 # -------------------------------
 # Step 6: Already submitted
 # -------------------------------
-elif st.session_state.prolific_id is not None:
+def step_done():
     st.success(f"✅ You already submitted Prolific ID: {st.session_state.prolific_id}")
+
+
+STEPS = {
+    "device": step_device,
+    "working": step_working,
+    "options": step_options,
+    "unable_to_wipe": step_unable_to_wipe,
+    "wipe": step_wipe,
+    "links": step_links,
+    "submit": step_submit,
+    "done": step_done,
+}
+
+
+# Widget interactions inside the fragment rerun only the wizard, not the page
+# setup above (injected markup, session defaults, backend start-up)
+@st.fragment
+def wizard():
+    step = current_step()
+
+    #st.title("♻️ Hi, I'm Mo - The Sustainable Electronics Assistant")
+    if step == "device":
+        st.title("♻️ Hi, I'm Mo - The Sustainable Electronics Assistant")
+    else:
+        st.markdown("### ♻️ Hi, I'm Mo - The Sustainable Electronics Assistant")
+
+    # Time each wizard step's render (no-op unless metrics are enabled)
+    with metrics.span("wizard_render", step=step):
+        STEPS[step]()
+
+    # Unchanged state is skipped and changes are written in the background
+    session_store.save(st.session_state.session_token, {key: st.session_state[key] for key in PERSISTED_KEYS})
+
+
+wizard()
@@ -0,0 +1,102 @@
+"""
+Script executions per completed wizard session.
+
+Counts every run of the app script (full runs, and fragment-only runs) while
+the load test's simulated participants go from step 0 to the Prolific ID.
+Compare against another version of the app with --app:
+
+    git show HEAD~1:Mo_Dash7.py > Mo_Dash7_before.py
+    python benchmarks/bench_reruns.py --sessions 20 --app Mo_Dash7_before.py
+
+AppTest starts every interaction as a full run, so this measures the runs
+each interaction costs (one per click, plus one per st.rerun()). In the
+browser, interactions inside the wizard fragment are fragment-only runs.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from load_test import APP_PATH, STEPS, _setup_backends, run_session  # noqa: E402
+
+
+def count_script_runs():
+    """Patch the script runner to tally runs; returns the live counter dict."""
+    from streamlit.runtime.scriptrunner.script_runner import ScriptRunner
+
+    counts = {"full": 0, "fragment": 0}
+    install_event_loop = ScriptRunner._install_event_loop
+
+    # _run_script loops in place on st.rerun(), calling this once per run;
+    # its rerun_data says whether the run is scoped to fragments
+    def counted(self):
+        caller = sys._getframe(1)
+        if caller.f_code.co_name == "_run_script":
+            rerun_data = caller.f_locals["rerun_data"]
+            counts["fragment" if rerun_data.fragment_id_queue else "full"] += 1
+        return install_event_loop(self)
+
+    ScriptRunner._install_event_loop = counted
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Count Mo_Dash7 script executions per session")
+    parser.add_argument("--sessions", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--app", default=APP_PATH, help="app script to measure")
+    parser.add_argument("--json", help="also write results to this file")
+    args = parser.parse_args()
+    args.sheet_latency, args.quota_per_minute, args.error_rate = 0.0, None, 0.0
+    app_path = os.path.abspath(args.app)
+
+    _setup_backends(args)
+    import sellcell_data
+
+    devices = sellcell_data.get_all_devices()
+    counts = count_script_runs()
+    interactions = {step: 0 for step in STEPS}
+    errors = []
+    prolific_ids = []
+
+    def record(step, seconds):
+        interactions[step] += 1
+
+    for n in range(args.sessions):
+        rng = random.Random(args.seed * 100003 + n)
+        try:
+            run_session(devices, rng, prolific_ids, args.timeout, record, app_path=app_path)
+        except Exception as exc:
+            errors.append(repr(exc))
+
+    completed = args.sessions - len(errors)
+    total_interactions = sum(interactions.values())
+    results = {
+        "app": os.path.relpath(app_path, ROOT),
+        "sessions": args.sessions,
+        "failed_sessions": len(errors),
+        "interactions": total_interactions,
+        "full_runs": counts["full"],
+        "fragment_runs": counts["fragment"],
+        "full_runs_per_session": counts["full"] / completed if completed else float("nan"),
+        "full_runs_per_interaction": counts["full"] / total_interactions if total_interactions else float("nan"),
+    }
+
+    print(f"{results['app']}: {completed}/{args.sessions} sessions, {total_interactions} interactions")
+    print(f"full script runs: {counts['full']} ({results['full_runs_per_session']:.1f}/session, "
+          f"{results['full_runs_per_interaction']:.2f}/interaction), fragment runs: {counts['fragment']}")
+    for error in errors[:10]:
+        print("error:", error)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Cold-start benchmark: SellCell.xlsx via pandas/openpyxl vs the compiled snapshot.
+
+Each measurement runs in a fresh interpreter so imports and parsing are paid
+in full, and reports wall time to the first device list plus peak RSS.
+
+    python benchmarks/bench_snapshot.py [--runs 5]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_CHILD_PRELUDE = """
+import json, resource, sys, time
+t0 = time.perf_counter()
+sys.path.insert(0, {root!r})
+"""
+
+_CHILD_EPILOGUE = """
+elapsed = time.perf_counter() - t0
+# VmHWM is reset on exec; ru_maxrss can carry over the parent's peak on Linux
+try:
+    with open("/proc/self/status") as f:
+        rss_kb = next(int(line.split()[1]) for line in f if line.startswith("VmHWM:"))
+except OSError:
+    rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({{"seconds": elapsed, "rss_mb": rss_kb / 1024, "devices": n}}))
+"""
+
+CASES = {
+    # What load_sellcell_data() + get_all_devices() did before caching
+    "legacy read_excel": """
+import pandas as pd
+sheets = pd.read_excel("SellCell.xlsx", sheet_name=None, header=[0,1])
+n = sum(df.iloc[:, 0].dropna().nunique() for df in sheets.values())
+""",
+    "catalog from xlsx": """
+import sellcell_data
+sellcell_data.SNAPSHOT_PATH = "does-not-exist.snapshot"
+n = len(sellcell_data.get_all_devices())
+""",
+    "catalog from snapshot": """
+import sellcell_data
+n = len(sellcell_data.get_all_devices())
+assert sellcell_data.get_cache_stats()["snapshot_loads"] == 1
+""",
+}
+
+
+def run_case(code):
+    script = _CHILD_PRELUDE.format(root=ROOT) + code + _CHILD_EPILOGUE.format()
+    out = subprocess.run([sys.executable, "-c", script], cwd=ROOT, check=True,
+                         capture_output=True, text=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    sys.path.insert(0, ROOT)
+    import sellcell_snapshot
+    sellcell_snapshot.build_snapshot(os.path.join(ROOT, "SellCell.xlsx"),
+                                     os.path.join(ROOT, "SellCell.snapshot"))
+
+    print(f"{'case':<24}{'cold start (ms)':>18}{'peak RSS (MB)':>16}{'devices':>10}")
+    for name, code in CASES.items():
+        results = [run_case(code) for _ in range(args.runs)]
+        seconds = statistics.median(r["seconds"] for r in results)
+        rss = statistics.median(r["rss_mb"] for r in results)
+        print(f"{name:<24}{seconds * 1000:>18.1f}{rss:>16.1f}{results[0]['devices']:>10}")
+
+
+if __name__ == "__main__":
+    main()
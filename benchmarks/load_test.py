@@ -0,0 +1,328 @@
+"""
+Concurrent-session load test for the Mo_Dash7 wizard.
+
+Drives N simulated participants headlessly through steps 0 → 4 with
+Streamlit's AppTest, picking random SellCell devices (plus the unlisted path),
+both working states and every decision/wipe branch. Google Sheets is replaced
+by an in-process FakeWorksheet that can inject latency and quota errors, so
+nothing touches the network.
+
+    python benchmarks/load_test.py --sessions 50 --processes 4 \\
+        --sheet-latency 0.3 --quota-per-minute 60 --json results.json
+
+Reports p50/p95/p99 latency per step, session throughput and per-process
+memory. Sessions run serially inside each worker process (AppTest is not
+thread-safe); --processes sets how many run at once.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+APP_PATH = os.path.join(ROOT, "Mo_Dash7.py")
+STEPS = ["load", "search", "confirm_device", "working", "decision", "wipe", "links", "submit"]
+
+
+class QuotaExceeded(Exception):
+    """Looks like gspread's APIError for a 429 to the submission flusher."""
+
+    code = 429
+
+
+class FakeCell:
+    def __init__(self, row, col):
+        self.row = row
+        self.col = col
+
+
+class FakeWorksheet:
+    """In-memory stand-in for a gspread Worksheet with injectable latency and quota."""
+
+    def __init__(self, latency=0.0, quota_per_minute=None, error_rate=0.0, seed=0):
+        self.latency = latency
+        self.quota_per_minute = quota_per_minute
+        self.error_rate = error_rate
+        self.rows = []
+        self.stats = {"requests": 0, "quota_errors": 0, "injected_errors": 0}
+        self._lock = threading.Lock()
+        self._requests = []
+        self._random = random.Random(seed)
+
+    def _request(self):
+        time.sleep(self.latency)
+        with self._lock:
+            now = time.monotonic()
+            self.stats["requests"] += 1
+            self._requests = [t for t in self._requests if now - t < 60]
+            if self.quota_per_minute is not None and len(self._requests) >= self.quota_per_minute:
+                self.stats["quota_errors"] += 1
+                raise QuotaExceeded("Quota exceeded for 'Write requests per minute per user'")
+            self._requests.append(now)
+            if self._random.random() < self.error_rate:
+                self.stats["injected_errors"] += 1
+                raise QuotaExceeded("injected error")
+
+    def append_rows(self, rows, **kwargs):
+        self._request()
+        with self._lock:
+            self.rows.extend(list(row) for row in rows)
+
+    def append_row(self, row, **kwargs):
+        self.append_rows([row])
+
+    def col_values(self, col):
+        self._request()
+        with self._lock:
+            return [row[col - 1] if len(row) >= col else "" for row in self.rows]
+
+    def find(self, query, in_column=None):
+        self._request()
+        with self._lock:
+            for i, row in enumerate(self.rows, 1):
+                if row and (query.match(row[0]) if hasattr(query, "match") else row[0] == query):
+                    return FakeCell(i, 1)
+        return None
+
+    def update(self, values, range_name, **kwargs):
+        self._request()
+        row = int("".join(ch for ch in range_name.split(":")[0] if ch.isdigit()))
+        with self._lock:
+            self.rows[row - 1] = list(values[0])
+
+
+class FakePool:
+    def __init__(self, worksheet):
+        self._worksheet = worksheet
+
+    def worksheet(self, sheet_name=None, key=None):
+        return self._worksheet
+
+    def stats(self):
+        return {}
+
+
+def _button(at, label):
+    return next(b for b in at.button if b.label == label)
+
+
+def _percentile(values, pct):
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * pct / 100
+    lo, hi = int(k), min(int(k) + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+def _memory_mb():
+    try:
+        with open("/proc/self/status") as f:
+            fields = dict(line.split(":", 1) for line in f)
+        return {key: int(fields[key].split()[0]) / 1024 for key in ("VmRSS", "VmHWM")}
+    except OSError:
+        import resource
+        return {"VmHWM": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}
+
+
+def run_session(devices, rng, prolific_ids, timeout, record, app_path=APP_PATH):
+    """One participant, start to finish; record(step, seconds) is called per interaction."""
+    from streamlit.testing.v1 import AppTest
+
+    def timed(step, action):
+        start = time.perf_counter()
+        result = action()
+        record(step, time.perf_counter() - start)
+        if result.exception:
+            raise RuntimeError(f"{step}: {result.exception[0].message}")
+        return result
+
+    at = AppTest.from_file(app_path, default_timeout=timeout)
+    timed("load", at.run)
+
+    # Step 0: search and confirm a device (or the unlisted path)
+    if rng.random() < 0.15:
+        timed("confirm_device", _button(at, "📵 Model unknown or not listed").click().run)
+    else:
+        device = rng.choice(devices)
+        timed("search", at.text_input[0].input(device).run)
+        if device in at.selectbox[0].options:
+            at.selectbox[0].select(device)
+        timed("confirm_device", _button(at, "Confirm Device").click().run)
+
+    # Step 1: working?
+    working = rng.choice(["Yes", "No/I do not know"])
+    at.radio[0].set_value(working)
+    timed("working", _button(at, "Continue").click().run)
+
+    # Step 2: pick any offered decision
+    at.radio[0].set_value(rng.choice(at.radio[0].options))
+    timed("decision", _button(at, "Confirm Choice").click().run)
+
+    # Step 3: wipe, or report being unable to
+    if working == "Yes" and rng.random() < 0.7:
+        timed("wipe", _button(at, "✅ I've wiped my device").click().run)
+    else:
+        if working == "Yes":
+            timed("wipe", _button(at, "⚠️ I was unable to wipe").click().run)
+        timed("wipe", _button(at, "✅ I understand").click().run)
+
+    timed("links", _button(at, "✅ Done viewing links").click().run)
+
+    # Step 4: Prolific ID, sometimes re-used to exercise deduplication
+    if prolific_ids and rng.random() < 0.05:
+        prolific_id = rng.choice(prolific_ids)
+    else:
+        prolific_id = "%024x" % rng.getrandbits(96)
+        prolific_ids.append(prolific_id)
+    timed("submit", at.text_input[0].input(prolific_id).run)
+
+
+def _setup_backends(args):
+    """Point Sheets, the submission spool, the ID index, the session store and the price history at local stand-ins."""
+    os.chdir(ROOT)  # the app opens SellCell.xlsx relative to the working directory
+    import prolific_index
+    import sellcell_data
+    import session_store
+    import sheets_pool
+    import submission_queue
+
+    workdir = tempfile.mkdtemp(prefix="mo-load-")
+    worksheet = FakeWorksheet(args.sheet_latency, args.quota_per_minute, args.error_rate, args.seed)
+    sheets_pool.set_pool(FakePool(worksheet))
+    submission_queue.start_flusher(lambda: worksheet, spool_path=os.path.join(workdir, "submissions.db"))
+    prolific_index.get_prolific_index(path=os.path.join(workdir, "prolific_ids.db"))
+    session_store.set_session_store(session_store.SQLiteSessionStore(os.path.join(workdir, "sessions.db")))
+    sellcell_data.PRICE_HISTORY_PATH = os.path.join(workdir, "price_history.db")
+    return worksheet
+
+
+def run_worker(args, worker_id):
+    """
+    Run this worker's share of the sessions back to back in one process.
+    AppTest keeps global state, so sessions within a process never overlap;
+    concurrency comes from running several worker processes.
+    """
+    import prolific_index
+    import sellcell_data
+    import submission_queue
+
+    worksheet = _setup_backends(args)
+    devices = sellcell_data.get_all_devices()
+    latencies = {step: [] for step in STEPS}
+    errors = []
+    prolific_ids = []
+
+    def record(step, seconds):
+        latencies[step].append(seconds)
+
+    for n in range(worker_id, args.sessions, args.processes):
+        rng = random.Random(args.seed * 100003 + n)
+        try:
+            run_session(devices, rng, prolific_ids, args.timeout, record)
+        except Exception as exc:
+            errors.append(repr(exc))
+
+    # Let the write-behind queue drain so quota/latency effects show up in the totals
+    deadline = time.monotonic() + args.drain_timeout
+    while time.monotonic() < deadline:
+        counts = submission_queue.get_queue_stats()
+        if counts.get("pending", 0) == 0 and counts.get("inflight", 0) == 0:
+            break
+        time.sleep(0.1)
+
+    return {
+        "latencies": latencies,
+        "errors": errors,
+        "memory_mb": _memory_mb(),
+        "sheet": dict(worksheet.stats, rows=len(worksheet.rows)),
+        "queue": submission_queue.get_queue_stats(),
+        "prolific_index": prolific_index.get_prolific_index().stats(),
+        "catalog_cache": sellcell_data.get_cache_stats(),
+    }
+
+
+def _sum_dicts(dicts):
+    total = {}
+    for d in dicts:
+        for key, value in d.items():
+            if isinstance(value, (int, float)):
+                total[key] = total.get(key, 0) + value
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless load test for Mo_Dash7.py")
+    parser.add_argument("--sessions", type=int, default=20)
+    parser.add_argument("--processes", type=int, default=1, help="concurrent worker processes")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--timeout", type=float, default=30.0, help="per-interaction AppTest timeout")
+    parser.add_argument("--sheet-latency", type=float, default=0.0, help="seconds per fake Sheets request")
+    parser.add_argument("--quota-per-minute", type=int, default=None)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--drain-timeout", type=float, default=60.0)
+    parser.add_argument("--json", help="also write results to this file")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if args.processes == 1:
+        workers = [run_worker(args, 0)]
+    else:
+        with ProcessPoolExecutor(max_workers=args.processes) as pool:
+            workers = list(pool.map(run_worker, [args] * args.processes, range(args.processes)))
+    elapsed = time.perf_counter() - start
+
+    latencies = {step: [t for w in workers for t in w["latencies"][step]] for step in STEPS}
+    errors = [e for w in workers for e in w["errors"]]
+    index_stats = _sum_dicts(w["prolific_index"] for w in workers)
+    index_stats["duplicate_rate"] = index_stats["duplicates"] / index_stats["checks"] if index_stats.get("checks") else 0.0
+    results = {
+        "sessions": args.sessions,
+        "processes": args.processes,
+        "failed_sessions": len(errors),
+        "errors": errors[:10],
+        "seconds": elapsed,
+        "sessions_per_second": (args.sessions - len(errors)) / elapsed,
+        "steps": {
+            step: {
+                "n": len(values),
+                "p50_ms": _percentile(values, 50) * 1000,
+                "p95_ms": _percentile(values, 95) * 1000,
+                "p99_ms": _percentile(values, 99) * 1000,
+            }
+            for step, values in latencies.items()
+        },
+        "memory_mb_per_process": [w["memory_mb"] for w in workers],
+        "sheet": _sum_dicts(w["sheet"] for w in workers),
+        "queue": _sum_dicts(w["queue"] for w in workers),
+        "prolific_index": index_stats,
+        "catalog_cache": _sum_dicts(w["catalog_cache"] for w in workers),
+    }
+
+    print(f"{args.sessions} sessions, {args.processes} process(es): "
+          f"{results['sessions_per_second']:.2f} sessions/s, {len(errors)} failed")
+    print(f"{'step':<16}{'n':>6}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for step, summary in results["steps"].items():
+        print(f"{step:<16}{summary['n']:>6}{summary['p50_ms']:>10.1f}{summary['p95_ms']:>10.1f}{summary['p99_ms']:>10.1f}")
+    for i, memory in enumerate(results["memory_mb_per_process"]):
+        print(f"process {i} memory (MB):", {k: round(v, 1) for k, v in memory.items()})
+    print("sheet:", results["sheet"])
+    print("queue:", results["queue"])
+    print("prolific index:", results["prolific_index"])
+    for error in errors[:10]:
+        print("error:", error)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+"""
+Generate the static flyer (index.html) from the shared catalog in content.py.
+
+QR codes are encoded locally (segno) and inlined as SVG data URIs, cached on
+disk by URL hash, so the page makes no external requests and can be served
+as a single file from a CDN.
+
+    python build_index.py [-o index.html]
+"""
+import argparse
+import hashlib
+import html
+import os
+
+from content import FLYER_HEADING, FLYER_NOTE, FLYER_SECTIONS, FLYER_TITLE, FLYER_WIPE, LINKS
+
+QR_CACHE_DIR = ".qr_cache"
+QR_SIZE = 60
+
+CSS = """\
+        body {
+            font-family: Arial;
+            font-size: 18px;
+            max-width: 900px;
+            margin: 0 auto;
+            padding: 40px 20px;
+            background-color: #f5f5f5;
+        }
+        .container {
+            background-color: white;
+            padding: 40px;
+            border-radius: 8px;
+            box-shadow: 0 2px 10px rgba(0,0,0,0.1);
+        }
+        h1 {
+            font-family: Arial;
+            color: #333;
+            font-size: 28px;
+            font-weight: normal;
+            margin-bottom: 30px;
+            text-align: left;
+            line-height: 1.4;
+        }
+        h2 {
+            color: #333;
+            font-size: 20px;
+            margin-top: 30px;
+            margin-bottom: 10px;
+        }
+        p {
+            color: #333;
+            line-height: 1.6;
+            margin-bottom: 15px;
+        }
+        ul {
+            list-style-type: none;
+            padding-left: 0;
+            margin-bottom: 20px;
+        }
+        li {
+            margin: 15px 0;
+            padding-left: 0;
+            position: relative;
+            line-height: 1.6;
+            display: flex;
+            align-items: center;
+            gap: 15px;
+        }
+        a {
+            color: #3498db;
+            text-decoration: none;
+            font-weight: 500;
+        }
+        a:hover {
+            text-decoration: underline;
+        }
+        .important {
+            padding: 0;
+            margin: 30px 0;
+        }
+        .important p:first-child {
+            font-weight: bold;
+            color: #000;
+            margin-bottom: 15px;
+        }
+        .important p:last-child {
+            margin-bottom: 0;
+        }
+        .note {
+            padding: 0;
+            margin-top: 30px;
+        }
+        .note p {
+            margin: 0;
+        }
+"""
+
+
+def qr_data_uri(url, cache_dir=QR_CACHE_DIR) -> str:
+    """SVG data URI for a QR code of url, cached by URL hash."""
+    os.makedirs(cache_dir, exist_ok=True)
+    path = os.path.join(cache_dir, hashlib.sha256(url.encode("utf-8")).hexdigest()[:32] + ".txt")
+    if os.path.exists(path):
+        with open(path) as f:
+            return f.read()
+    try:
+        import segno
+    except ImportError:
+        raise SystemExit("build_index.py needs segno to encode QR codes: pip install segno")
+    uri = segno.make(url, error="l", micro=False).svg_data_uri(border=2, xmldecl=False)
+    with open(path, "w") as f:
+        f.write(uri)
+    return uri
+
+
+def _link(entry):
+    key, label = entry if isinstance(entry, tuple) else (entry, None)
+    link = LINKS[key]
+    return link["url"], label or link["label"]
+
+
+def _qr_img(url, label):
+    return (
+        f'<img class="qr-code" src="{qr_data_uri(url)}" width="{QR_SIZE}" height="{QR_SIZE}" '
+        f'alt="QR Code for {html.escape(label)}">'
+    )
+
+
+def _link_row(entries, indent):
+    pad = " " * indent
+    lines = [f'{pad}<li style="display: flex; gap: 40px;">']
+    for entry in entries:
+        url, label = _link(entry)
+        lines += [
+            f'{pad}    <span style="display: flex; align-items: center; gap: 15px;">',
+            f"{pad}        {_qr_img(url, label)}",
+            f'{pad}        <a href="{html.escape(url)}">{html.escape(label)}</a>',
+            f"{pad}    </span>",
+        ]
+    lines.append(f"{pad}</li>")
+    return lines
+
+
+def _link_with_note(entry, note, indent):
+    pad = " " * indent
+    url, label = _link(entry)
+    return [
+        f"{pad}<li>",
+        f"{pad}    {_qr_img(url, label)}",
+        f'{pad}    <span><a href="{html.escape(url)}">{html.escape(label)}</a> – {html.escape(note)}</span>',
+        f"{pad}</li>",
+    ]
+
+
+def render() -> str:
+    body = [f"        <h1>{html.escape(FLYER_HEADING, quote=False)}</h1>", ""]
+    for section in FLYER_SECTIONS:
+        body.append(f"        <p><strong>{section['name']}: </strong>{html.escape(section['text'], quote=False)}</p>")
+        body.append("        <ul>")
+        if section.get("note"):
+            for entry in section["links"]:
+                body += _link_with_note(entry, section["note"], 12)
+        else:
+            body += _link_row(section["links"], 12)
+        body.append("        </ul>")
+        if section.get("after"):
+            body.append(f"        <p>{html.escape(section['after'], quote=False)}</p>")
+        body.append("")
+
+    body.append('        <div class="important">')
+    body.append(f"            <p>{html.escape(FLYER_WIPE['text'], quote=False)}</p>")
+    for heading, entries in FLYER_WIPE["groups"]:
+        if heading:
+            body.append(f"            <p><strong>{html.escape(heading)}</strong></p>")
+        body.append("            <ul>")
+        body += _link_row(entries, 16)
+        body.append("            </ul>")
+    body.append("        </div>")
+    body.append("")
+    body.append('        <div class="note">')
+    body.append(f"            <p><strong>Note: </strong>{html.escape(FLYER_NOTE, quote=False)}</p>")
+    body.append("        </div>")
+
+    return "\n".join([
+        "<!DOCTYPE html>",
+        '<html lang="en">',
+        "<head>",
+        '    <meta charset="UTF-8">',
+        '    <meta name="viewport" content="width=device-width, initial-scale=1.0">',
+        f"    <title>{html.escape(FLYER_TITLE)}</title>",
+        "    <style>",
+        CSS.rstrip("\n"),
+        "    </style>",
+        "</head>",
+        "<body>",
+        '    <div class="container">',
+        *body,
+        "    </div>",
+        "</body>",
+        "</html>",
+        "",
+    ])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the static index.html flyer")
+    parser.add_argument("-o", "--output", default="index.html")
+    args = parser.parse_args()
+    page = render()
+    with open(args.output, "w", encoding="utf-8") as f:
+        f.write(page)
+    print(f"Wrote {args.output} ({len(page.encode('utf-8')) // 1024} KiB)")
+
+
+if __name__ == "__main__":
+    main()
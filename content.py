@@ -0,0 +1,214 @@
+"""
+Shared link and content catalog for the Streamlit app and the static flyer
+(index.html, generated by build_index.py). Edit URLs and link text here only.
+"""
+from functools import lru_cache
+
+
+LINKS = {
+    "backmarket": {
+        "label": "BackMarket",
+        "url": "https://www.backmarket.com/en-us/buyback/home",
+    },
+    "gazelle": {
+        "label": "Gazelle",
+        "url": "https://www.gazelle.com/trade-in?_gl=1*1qgg1ts*_gcl_aw*R0NMLjE3NTc3MDA4NDguQ2p3S0NBandpWV9HQmhCRUVpd0FGYWdodnJrRElUenlqZ3M1QkU5YmJRd2JtTFRFNkxSNWc0SkJCdDhleXJXakU3emFPOXlMV2VHN01Sb0MxSThRQXZEX0J3RQ..*_gcl_au*NTk2NzI0NDQ3LjE3NTc3MDA4MzQuMzAwODg2NTE0LjE3NTgyMzExMjEuMTc1ODIzMTEyMQ..*_ga*MTU5NTIxODU5Mi4xNzQ1OTUxMjYw*_ga_6918GRRZ0Y*czE3NjM2NjE0MDIkbzYkZzEkdDE3NjM2NjE0MDQkajU3JGwwJGgxMTc4NzE4Mzg0",
+    },
+    "goodwill": {
+        "label": "Goodwill",
+        "url": "https://www.google.com/maps/search/Goodwill+near+me",
+    },
+    "salvation_army": {
+        "label": "Salvation Army",
+        "url": "https://www.google.com/maps/search/Salvation+Army+near+me",
+    },
+    "bestbuy": {
+        "label": "Best Buy",
+        "url": "https://www.google.com/maps/search/BestBuy+near+me",
+    },
+    "apple_find_my": {
+        "label": "Apple Guide",
+        "url": "https://support.apple.com/guide/icloud/remove-devices-and-items-from-find-my-mmdc23b125f6/icloud",
+    },
+    "apple_erase": {
+        "label": "Erase iPhone Guide",
+        "url": "https://support.apple.com/guide/iphone/erase-iphone-iph7a2a9399b/ios",
+    },
+    "android_account": {
+        "label": "Android Guide",
+        "url": "https://support.google.com/accounts/answer/81987?hl=en&co=GENIE.Platform%3DAndroid",
+    },
+    "android_erase": {
+        "label": "Erase Android Guide",
+        "url": "https://support.google.com/android/answer/6088915?hl=en",
+    },
+}
+
+URLS = {key: link["url"] for key, link in LINKS.items()}
+
+
+# -------------------------------
+# Static flyer (index.html)
+# -------------------------------
+# Links are catalog keys, or (key, label) to override the link text.
+FLYER_TITLE = "Smartphone Disposal Guide"
+FLYER_HEADING = "Do you have an old Smartphone that nobody is using? Here are your options!"
+
+FLYER_SECTIONS = [
+    {
+        "name": "Resell",
+        "text": "You could earn cash by selling your old phone. Try the following websites to get an estimate of your smartphone's current worth:",
+        "links": ["backmarket", "gazelle"],
+        "after": "It's easy to resell, either vendor will send you a box with prepaid postage.",
+    },
+    {
+        "name": "Donate",
+        "text": "Your used phone may not fetch a high price, but if still working and holding a charge, donating gives it a new life. You can try donating your device, for example these organizations that have drop-off sites around the U.S.",
+        "links": ["goodwill", "salvation_army"],
+    },
+    {
+        "name": "Recycle",
+        "text": "If you do not want to resell or donate, you can bring it for recycling, for example:",
+        "links": ["bestbuy"],
+        "note": "Free electronics recycling at all stores, usually there is a bin near Customer Service.",
+    },
+]
+
+FLYER_WIPE = {
+    "text": "IMPORTANT: WIPE YOUR DATA FIRST! Before giving up your smartphone, remember to remove it from your list of owned devices and completely erase your data.",
+    "groups": [
+        (None, [("android_account", "Remove device from Google Account"), ("android_erase", "Erase data")]),
+        ("For Apple/iPhone devices:", [("apple_find_my", "Remove device from Apple account (Find My)"), ("apple_erase", "Erase data")]),
+    ],
+}
+
+FLYER_NOTE = "Sometimes it is difficult or impossible to erase data, e.g. if the phone is broken. In these situations, you will have to decide for yourself if you feel comfortable recycling or donating phone."
+
+
+# -------------------------------
+# Wizard steps 2 and 3
+# -------------------------------
+# Content is data; step2_blocks()/step3_blocks() compile it once per input
+# combination into a few pre-joined blocks. A block is (kind, text) with kind
+# "markdown" (rendered with HTML allowed), "info" or "warning"; {device},
+# {price} and {decision} are filled in at render time.
+
+UNLISTED_MODEL = "Unlisted Model"
+
+RESELL_BLOCKS = [
+    ("markdown", "**It's easy to resell, either vendor will send you a box with prepaid postage.**"),
+    ("markdown",
+     "Try the following websites to get an estimate of your smartphone's current worth:  \n"
+     f"- [BackMarket]({URLS['backmarket']}) -  This link leads to site to get a quote to sell your smartphone to BackMarket \n"
+     f"- [Gazelle]({URLS['gazelle']}) - This link leads to site to get a quote to sell your smartphone to Gazelle \n"),
+    ("markdown", "Upon receiving the phone, the vendor will check battery condition, if it turns on, and if data has been wiped. If there are issues, they will likely adjust the offered price"),
+]
+
+STEP2_SECTIONS = {
+    "unlisted_warning": [
+        ("warning", "📵 Because the model is needed to resell the phone, your options are Donate or Recycle."),
+    ],
+    "options_header": [
+        ("markdown", "### 💡 Here are your options:"),
+    ],
+    # "price" is resolved per price-present when compiling
+    "resell_priced": [
+        ("markdown", "**Resell:** You could earn some cash by selling your old phone."),
+        ("price", None),
+    ] + RESELL_BLOCKS,
+    "resell": [
+        ("markdown", "**Resell:** You could earn some cash by selling your old phone."),
+    ] + RESELL_BLOCKS,
+    "donate": [
+        ("markdown",
+         "**Donate:** Your used phone may not fetch a high price, but if still working and holding a charge, donating gives it a new life. "
+         "You can try donating your device, for example at:  \n"
+         f"- [Goodwill]({URLS['goodwill']}) - This link shows the Google Map of nearby Goodwill locations. They accept working electronics at all locations\n"
+         f"- [Salvation Army]({URLS['salvation_army']}) - This link shows the Google Map of nearby Salvation Army locations, where electronics donations are accepted"),
+    ],
+    "recycle": [
+        ("markdown",
+         "**Recycle:** If your phone does not work or if you do not want to resell or donate, you can bring it for recycling, for example at:  \n"
+         f"- [Best Buy]({URLS['bestbuy']})  – This link shows the Google Map of nearby BestBuy locations. Free electronics recycling is available at all stores"),
+        ("markdown", "There is usually a bin near Customer Service for dropping in your consumer electronics."),
+    ],
+}
+
+PRICE_FOUND = ("markdown", "<p style='font-size: 30x;'>💰 Your {device} can fetch up to ${price} on resale!</p>")
+PRICE_MISSING = ("info", "ℹ️ Could not find resale price for {device}.")
+PRICE_PENDING = ("info", "⏳ The resale price for {device} is taking longer than usual. The sites below will give you a live quote.")
+# price_present → block; None means the lookup did not finish in time
+PRICE_BLOCKS = {True: PRICE_FOUND, False: PRICE_MISSING, None: PRICE_PENDING}
+
+# (device listed, working) → (Step 2 sections, decisions offered)
+STEP2_LAYOUTS = {
+    (True, True): (["options_header", "resell_priced", "donate", "recycle"], ["Resell", "Donate", "Recycle"]),
+    (False, True): (["unlisted_warning", "options_header", "donate", "recycle"], ["Donate", "Recycle"]),
+    (False, False): (["options_header", "recycle"], ["Recycle"]),
+    (True, False): (["options_header", "recycle", "resell"], ["Resell", "Recycle"]),
+}
+
+WIPE_INTRO = ("markdown", "<p style='font-size: 36x;'>🔒 Before you {decision} your device, please be sure to wipe your data</p>")
+
+WIPE_GUIDES = {
+    "ios": [
+        ("markdown", "#### For iPhones (iOS), this means:"),
+        ("markdown", f"- Step 1: Remove device from Find My: [Apple Guide]({URLS['apple_find_my']})\n"),
+        ("markdown", "All your Apple devices are registered with your account, no one else will be able to use the smartphone unless you deregister it. For iPhones (iOS), this means disabling Find My on your device."),
+        ("markdown", f"- Step 2: Erase All Content and Settings: [Erase iPhone Guide]({URLS['apple_erase']})"),
+        ("markdown", "This will involve selecting “Erase all Content and Settings” in the General section of the Settings app."),
+    ],
+    "android": [
+        ("markdown", "#### For Android phones, this means:"),
+        ("markdown", f"- Step 1: Removing smartphone from account: [Android Guide]({URLS['android_account']})\n"),
+        ("markdown", "Your smartphone is linked to your Google account, and no one else can use it unless you remove it from your list of devices."),
+        ("markdown", f"- Step 2: Erase All Content and Settings: [Erase Android Guide]({URLS['android_erase']})"),
+    ],
+}
+
+UNABLE_TO_WIPE = ("warning",
+                  "⚠️ Sometimes it becomes too difficult or impossible to erase your data. "
+                  "The phone may be non-functional. In these situations, you will have to decide for yourself "
+                  "if you feel comfortable recycling or reselling phones.")
+
+
+def device_os(device) -> str:
+    """"ios", "android", or "both" when the model is unknown."""
+    if device == UNLISTED_MODEL:
+        return "both"
+    return "ios" if "iphone" in device.lower() else "android"
+
+
+def _merge(blocks):
+    """Join runs of markdown blocks so each run is a single element on the page."""
+    merged = []
+    for kind, text in blocks:
+        if merged and kind == "markdown" and merged[-1][0] == "markdown":
+            merged[-1] = ("markdown", merged[-1][1] + "\n\n" + text)
+        else:
+            merged.append((kind, text))
+    return tuple(merged)
+
+
+def decision_options(listed, working) -> list:
+    return list(STEP2_LAYOUTS[(listed, working)][1])
+
+
+@lru_cache(maxsize=None)
+def step2_blocks(listed, working, price_present):
+    sections, _ = STEP2_LAYOUTS[(listed, working)]
+    blocks = []
+    for name in sections:
+        for block in STEP2_SECTIONS[name]:
+            if block[0] == "price":
+                block = PRICE_BLOCKS[price_present]
+            blocks.append(block)
+    return _merge(blocks)
+
+
+@lru_cache(maxsize=None)
+def step3_blocks(os_type):
+    blocks = [WIPE_INTRO]
+    for name in (("ios", "android") if os_type == "both" else (os_type,)):
+        blocks += WIPE_GUIDES[name]
+    return _merge(blocks)
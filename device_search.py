@@ -0,0 +1,189 @@
+"""
+Typeahead search over SellCell device names for the Step 0 model picker.
+
+The index is built once per catalog version and matches each query token by
+exact token, prefix, or a small edit distance (found through token trigrams),
+so "iphone se" returns every SE generation and "iphnoe 13" still finds the
+iPhone 13 family. Results are cached per (query, k).
+"""
+import bisect
+import re
+import threading
+from functools import lru_cache
+
+from sellcell_data import add_reload_hook, get_all_devices, get_catalog_version, get_sellcell_prices
+
+_TOKEN_RE = re.compile(r"[a-z0-9+]+")
+# Splits run-together queries such as "iphone16" into "iphone", "16"
+_SPLIT_RE = re.compile(r"[a-z]+|[0-9]+\+?")
+_NATURAL_RE = re.compile(r"(\d+)")
+_STORAGE_TOKEN_RE = re.compile(r"(\d+)[gt]b")
+
+# Per query-token match scores
+_EXACT, _PREFIX, _FUZZY = 3, 2, 1
+
+
+def tokenize(text) -> list:
+    return _TOKEN_RE.findall(str(text).lower())
+
+
+def _natural_key(name):
+    return [int(part) if part.isdigit() else part for part in _NATURAL_RE.split(name)]
+
+
+def _trigrams(token):
+    padded = f"  {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _max_typos(token):
+    if len(token) < 4:
+        return 0
+    return 1 if len(token) < 8 else 2
+
+
+def _within_distance(a, b, limit):
+    """Edit distance (adjacent swaps count as one edit) between a and b is <= limit."""
+    if abs(len(a) - len(b)) > limit:
+        return False
+    before, previous = None, list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i] + [0] * len(b)
+        for j, cb in enumerate(b, 1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb))
+            if before is not None and j > 1 and ca == b[j - 2] and a[i - 2] == cb:
+                current[j] = min(current[j], before[j - 2] + 1)
+        if min(current) > limit:
+            return False
+        before, previous = previous, current
+    return previous[-1] <= limit
+
+
+class DeviceSearchIndex:
+    def __init__(self, devices, brands=None):
+        """devices: device names; brands: optional {device: brand} so "samsung" matches Galaxies."""
+        brands = brands or {}
+        self.devices = sorted(set(devices), key=lambda name: _natural_key(name.lower()))
+        self._names = [name.lower() for name in self.devices]
+        self._lengths = [len(tokenize(name)) for name in self.devices]
+        # token → ids of devices containing it
+        self._postings = {}
+        for i, name in enumerate(self.devices):
+            for token in tokenize(name) + tokenize(brands.get(name, "")):
+                self._postings.setdefault(token, set()).add(i)
+        self._vocab = sorted(self._postings)
+        # trigram → vocabulary tokens, used to find typo candidates
+        self._grams = {}
+        for token in self._vocab:
+            for gram in _trigrams(token):
+                self._grams.setdefault(gram, set()).add(token)
+        self.search = lru_cache(maxsize=4096)(self._search)
+
+    def _token_matches(self, query_token):
+        """{vocabulary token: score} for one query token."""
+        matches = {}
+        start = bisect.bisect_left(self._vocab, query_token)
+        for token in self._vocab[start:]:
+            if not token.startswith(query_token):
+                break
+            # A model number is not the start of a capacity: "12" must not
+            # match "128gb", though "128" still matches it
+            storage = _STORAGE_TOKEN_RE.fullmatch(token)
+            if storage and query_token.isdigit() and storage.group(1) != query_token:
+                continue
+            matches[token] = _EXACT if token == query_token else _PREFIX
+
+        limit = _max_typos(query_token)
+        if limit:
+            candidates = set()
+            for gram in _trigrams(query_token):
+                candidates |= self._grams.get(gram, set())
+            for token in candidates:
+                if token not in matches and (
+                    _within_distance(query_token, token, limit)
+                    or _within_distance(query_token, token[:len(query_token)], limit)
+                ):
+                    matches[token] = _FUZZY
+        return matches
+
+    def _has_prefix(self, query_token):
+        start = bisect.bisect_left(self._vocab, query_token)
+        return start < len(self._vocab) and self._vocab[start].startswith(query_token)
+
+    def _query_tokens(self, query):
+        tokens = []
+        for token in tokenize(query):
+            if self._has_prefix(token):
+                tokens.append(token)
+            else:
+                tokens.extend(_SPLIT_RE.findall(token) or [token])
+        return tokens
+
+    def _search(self, query, k=20):
+        query_tokens = self._query_tokens(query)
+        if not query_tokens:
+            return ()
+
+        # Every query token must match some token of the device (AND semantics)
+        scores = None
+        for query_token in query_tokens:
+            token_scores = {}
+            for token, score in self._token_matches(query_token).items():
+                for i in self._postings[token]:
+                    if score > token_scores.get(i, 0):
+                        token_scores[i] = score
+            if scores is None:
+                scores = token_scores
+            else:
+                scores = {i: s + token_scores[i] for i, s in scores.items() if i in token_scores}
+            if not scores:
+                return ()
+
+        phrase = " ".join(query_tokens)
+        ranked = sorted(
+            scores,
+            key=lambda i: (
+                -scores[i],
+                not self._names[i].startswith(phrase),
+                self._lengths[i],
+                i,
+            ),
+        )
+        return tuple(self.devices[i] for i in ranked[:k])
+
+
+_index_lock = threading.Lock()
+# (catalog version, DeviceSearchIndex) swapped in whole
+_index = None
+
+
+def get_search_index() -> DeviceSearchIndex:
+    """
+    Process-wide index, rebuilt when the SellCell catalog changes. The catalog
+    watcher rebuilds it right after a reload; requests arriving meanwhile keep
+    using the previous index rather than waiting for the new one.
+    """
+    global _index
+    version = get_catalog_version()
+    current = _index
+    if current is not None and current[0] == version:
+        return current[1]
+    if current is not None and not _index_lock.acquire(blocking=False):
+        return current[1]
+    if current is None:
+        _index_lock.acquire()
+    try:
+        if _index is None or _index[0] != version:
+            devices = get_all_devices()
+            brands = {name: record["brand"] for name, record in get_sellcell_prices(devices).items()}
+            _index = (version, DeviceSearchIndex(devices, brands))
+        return _index[1]
+    finally:
+        _index_lock.release()
+
+
+add_reload_hook(get_search_index)
+
+
+def search_devices(query, k=20) -> list:
+    return list(get_search_index().search(" ".join(tokenize(query)), k))
@@ -0,0 +1,233 @@
+"""
+Lightweight timings and counters for the app's hot paths.
+
+Disabled unless MO_METRICS=1 (or one of the exporters below is configured);
+when disabled, timed() returns the function unchanged and span()/inc() return
+immediately, so instrumentation costs next to nothing.
+
+    MO_METRICS=1                enable collection
+    MO_METRICS_FILE=path        rewrite a Prometheus text file every MO_METRICS_INTERVAL s
+    MO_METRICS_PORT=9108        serve the same text on http://MO_METRICS_HOST:PORT/metrics
+    MO_METRICS_HOST=127.0.0.1   address the endpoint binds to (0.0.0.0 for every interface)
+    MO_TRACE_LOG=path           append one JSON line per span, with its session id
+"""
+import bisect
+import functools
+import json
+import os
+import threading
+import time
+
+METRICS_FILE = os.environ.get("MO_METRICS_FILE")
+METRICS_PORT = os.environ.get("MO_METRICS_PORT")
+# Loopback by default so internal counters aren't public on the app host
+METRICS_HOST = os.environ.get("MO_METRICS_HOST", "127.0.0.1")
+TRACE_LOG = os.environ.get("MO_TRACE_LOG")
+ENABLED = bool(os.environ.get("MO_METRICS") or METRICS_FILE or METRICS_PORT or TRACE_LOG)
+INTERVAL = float(os.environ.get("MO_METRICS_INTERVAL", "15"))
+
+# Latency histogram bucket upper bounds, in seconds
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_lock = threading.Lock()
+# (name, sorted label items) → [bucket counts..., +Inf count, sum]
+_histograms = {}
+# (name, sorted label items) → value
+_counters = {}
+# callables returning {metric name: value} gauges, read at export time only
+_collectors = []
+_trace_lock = threading.Lock()
+
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+def observe(name, seconds, **labels):
+    if not ENABLED:
+        return
+    key = _key(name, labels)
+    with _lock:
+        hist = _histograms.get(key)
+        if hist is None:
+            hist = _histograms[key] = [0] * (len(BUCKETS) + 1) + [0.0]
+        hist[bisect.bisect_left(BUCKETS, seconds)] += 1
+        hist[-1] += seconds
+
+
+def inc(name, amount=1, **labels):
+    if not ENABLED:
+        return
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + amount
+
+
+def _session_id():
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+    except ImportError:
+        return None
+    ctx = get_script_run_ctx(suppress_warning=True)
+    return ctx.session_id if ctx else None
+
+
+def _trace(name, seconds, labels):
+    record = {"ts": time.time(), "span": name, "ms": round(seconds * 1000, 3), "session": _session_id()}
+    record.update(labels)
+    line = json.dumps(record, default=str) + "\n"
+    with _trace_lock:
+        with open(TRACE_LOG, "a") as f:
+            f.write(line)
+
+
+class _Span:
+    __slots__ = ("name", "labels", "start")
+
+    def __init__(self, name, labels):
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # Streamlit's st.rerun()/st.stop() unwind via exceptions; those still count
+        seconds = time.perf_counter() - self.start
+        observe(self.name, seconds, **self.labels)
+        if TRACE_LOG:
+            _trace(self.name, seconds, self.labels)
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def span(name, **labels):
+    """Context manager timing a block into the `name` histogram."""
+    return _Span(name, labels) if ENABLED else _NULL_SPAN
+
+
+def timed(name):
+    """Decorator timing every call into the `name` histogram (a no-op when disabled)."""
+    def decorator(func):
+        if not ENABLED:
+            return func
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with _Span(name, {}):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def register_collector(collect):
+    """collect() → {metric name: number}; called only when metrics are exported."""
+    if ENABLED:
+        with _lock:
+            _collectors.append(collect)
+
+
+def _format_labels(labels, extra=()):
+    items = list(labels) + list(extra)
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in items) + "}"
+
+
+def export_prometheus() -> str:
+    """Current metrics in the Prometheus text exposition format."""
+    with _lock:
+        histograms = {key: list(value) for key, value in _histograms.items()}
+        counters = dict(_counters)
+        collectors = list(_collectors)
+
+    lines = []
+    seen = set()
+    for (name, labels), hist in sorted(histograms.items()):
+        if name not in seen:
+            lines.append(f"# TYPE {name}_seconds histogram")
+            seen.add(name)
+        cumulative = 0
+        for bound, count in zip(BUCKETS + ("+Inf",), hist[:-1]):
+            cumulative += count
+            lines.append(f"{name}_seconds_bucket{_format_labels(labels, [('le', bound)])} {cumulative}")
+        lines.append(f"{name}_seconds_sum{_format_labels(labels)} {hist[-1]}")
+        lines.append(f"{name}_seconds_count{_format_labels(labels)} {cumulative}")
+    for (name, labels), value in sorted(counters.items()):
+        if name not in seen:
+            lines.append(f"# TYPE {name}_total counter")
+            seen.add(name)
+        lines.append(f"{name}_total{_format_labels(labels)} {value}")
+    for collect in collectors:
+        try:
+            gauges = collect()
+        except Exception:
+            continue
+        for name, value in sorted(gauges.items()):
+            if isinstance(value, (int, float)):
+                lines.append(f"# TYPE {name} gauge")
+                lines.append(f"{name} {value}")
+    return "\n".join(lines) + "\n"
+
+
+def write_prometheus(path):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        f.write(export_prometheus())
+    os.replace(tmp_path, path)
+
+
+def _serve(host, port):
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = export_prometheus().encode("utf-8")
+            self.send_response(200 if self.path == "/metrics" else 404)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    ThreadingHTTPServer((host, port), Handler).serve_forever()
+
+
+def _write_forever(path):
+    while True:
+        time.sleep(INTERVAL)
+        try:
+            write_prometheus(path)
+        except OSError:
+            pass
+
+
+_exporters_started = False
+
+
+def start_exporters():
+    """Start the configured file writer / HTTP endpoint once per process."""
+    global _exporters_started
+    with _lock:
+        if _exporters_started or not ENABLED:
+            return
+        _exporters_started = True
+    if METRICS_FILE:
+        threading.Thread(target=_write_forever, args=(METRICS_FILE,), name="metrics-file", daemon=True).start()
+    if METRICS_PORT:
+        threading.Thread(target=_serve, args=(METRICS_HOST, int(METRICS_PORT)), name="metrics-http", daemon=True).start()
@@ -0,0 +1,87 @@
+"""
+Static price bundle for client-side lookups.
+
+Exports the SellCell catalog as one compact JSON file that a static page (or
+any lightweight frontend) can fetch once and query without the server:
+
+    python price_bundle.py [out_dir]
+
+writes out_dir/prices.<hash>.json, named by the sha256 of its bytes so it can
+be served with a long-lived cache, and out_dir/prices.manifest.json pointing
+at the current bundle (serve that one uncached). Layout, columns by device:
+
+    {"format": 1, "source_digest": ..., "conditions": [...], "brands": [...],
+     "os": ["android", "ios"],
+     "devices": {"name": [...], "key": [...], "brand": [...], "os": [...],
+                 "max_price": [...], "prices": [[Mint, Good, ...], ...]}}
+
+"brand"/"os" are indexes into the lists above, "key" is the normalized name
+used for lookups, prices are Top Price per condition and null when missing.
+"""
+import hashlib
+import json
+import os
+import sys
+
+import sellcell_data
+from content import device_os
+
+FORMAT = 1
+OS_NAMES = ["android", "ios"]
+MANIFEST_NAME = "prices.manifest.json"
+
+
+def bundle_from_table(table, source_digest) -> dict:
+    """Bundle dict for a sellcell_data.CatalogTable."""
+    names = list(table.names)
+    os_idx = {name: i for i, name in enumerate(OS_NAMES)}
+    return {
+        "format": FORMAT,
+        "source_digest": source_digest,
+        "conditions": list(table.conditions),
+        "brands": list(table.brands),
+        "os": OS_NAMES,
+        "devices": {
+            "name": names,
+            "key": [sellcell_data.normalize_device_name(name) for name in names],
+            "brand": list(table.brand_idx),
+            "os": [os_idx[device_os(name)] for name in names],
+            "max_price": [sellcell_data.to_price(price) for price in table.max_price],
+            "prices": [
+                [sellcell_data.to_price(table.value(row, cond)) for cond in range(len(table.conditions))]
+                for row in range(len(names))
+            ],
+        },
+    }
+
+
+def encode_bundle(bundle) -> bytes:
+    return json.dumps(bundle, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def write_bundle(out_dir="."):
+    """Write the current catalog's bundle and manifest; returns the bundle path."""
+    table, digest = sellcell_data.get_catalog_table()
+    data = encode_bundle(bundle_from_table(table, digest))
+    version = hashlib.sha256(data).hexdigest()[:16]
+    filename = f"prices.{version}.json"
+
+    os.makedirs(out_dir, exist_ok=True)
+    path = os.path.join(out_dir, filename)
+    if not os.path.exists(path):
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    manifest = {"format": FORMAT, "version": version, "path": filename, "bytes": len(data)}
+    manifest_path = os.path.join(out_dir, MANIFEST_NAME)
+    with open(manifest_path + ".tmp", "w") as f:
+        json.dump(manifest, f)
+    os.replace(manifest_path + ".tmp", manifest_path)
+    return path
+
+
+if __name__ == "__main__":
+    out = write_bundle(*sys.argv[1:2])
+    print(f"Wrote {out} ({os.path.getsize(out)} bytes)")
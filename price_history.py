@@ -0,0 +1,312 @@
+"""
+Append-only history of SellCell prices across workbook exports.
+
+Each workbook is ingested once (by sha256) with an effective date. A price row
+(device, condition, date) is only stored when it differs from the value in
+effect at that date, so an export that changes a handful of prices adds a
+handful of rows. Lookups are index seeks in SQLite, so no snapshot has to be
+held in memory:
+
+    python price_history.py ingest SellCell.xlsx --date 2025-09-01
+    python price_history.py price "Galaxy S24 Ultra 256GB" Mint --as-of 2025-10-01
+    python price_history.py series "Galaxy S24 Ultra 256GB" Mint
+
+A device missing from a later export gets a NULL row, so as-of lookups after
+that date return None rather than a stale price. Exports can be ingested in
+any order: backfilling an older one pins the next snapshot's values with
+explicit rows where they would otherwise change.
+
+The app adds each workbook version it loads when MO_PRICE_HISTORY names the
+database file (see sellcell_data.start_catalog_watcher).
+"""
+import argparse
+import datetime
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+import sellcell_data
+
+HISTORY_PATH = "price_history.db"
+# (price, depreciation, depreciation_pct) of a device/condition absent from an export
+_MISSING = (None, None, None)
+
+
+def _iso_date(value) -> str:
+    if isinstance(value, datetime.datetime):
+        value = value.date()
+    if isinstance(value, datetime.date):
+        return value.isoformat()
+    return datetime.date.fromisoformat(str(value)).isoformat()
+
+
+class PriceHistory:
+    def __init__(self, path=HISTORY_PATH):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS snapshots (
+                source_digest TEXT PRIMARY KEY,
+                effective_date TEXT NOT NULL,
+                ingested_at REAL NOT NULL,
+                rows_added INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS devices (
+                device_key TEXT PRIMARY KEY,
+                name TEXT NOT NULL,
+                brand TEXT NOT NULL,
+                launch_year INTEGER
+            );
+            CREATE TABLE IF NOT EXISTS prices (
+                device_key TEXT NOT NULL,
+                condition TEXT NOT NULL,
+                effective_date TEXT NOT NULL,
+                price REAL,
+                depreciation REAL,
+                depreciation_pct REAL,
+                PRIMARY KEY (device_key, condition, effective_date)
+            ) WITHOUT ROWID;
+            """
+        )
+
+    def ingest_table(self, table, source_digest, effective_date) -> int:
+        """
+        Add a sellcell_data.CatalogTable as of effective_date; returns the
+        number of price rows stored (0 if this workbook was already ingested).
+        """
+        date = _iso_date(effective_date)
+        current = {}
+        devices = {}
+        for row, name in enumerate(table.names):
+            key = sellcell_data.normalize_device_name(name)
+            if key in devices:
+                continue  # first match wins, as in the live catalog
+            year = table.launch_year[row]
+            devices[key] = (key, name, table.brands[table.brand_idx[row]], year or None)
+            for c, cond in enumerate(table.conditions):
+                current[(key, cond)] = tuple(
+                    sellcell_data.to_price(table.value(row, c, m)) for m in range(len(sellcell_data.METRICS))
+                )
+
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                if self._conn.execute(
+                    "SELECT 1 FROM snapshots WHERE source_digest = ?", (source_digest,)
+                ).fetchone():
+                    self._conn.execute("ROLLBACK")
+                    return 0
+                # Value in effect at this date for every (device, condition) seen so far
+                previous = self._values_as_of(date)
+                changed = [
+                    (key, cond, date) + values
+                    for (key, cond), values in current.items()
+                    if previous.get((key, cond)) != values
+                ]
+                # Devices/conditions that disappeared in this export
+                changed += [
+                    (key, cond, date) + _MISSING
+                    for (key, cond), values in previous.items()
+                    if (key, cond) not in current and values != _MISSING
+                ]
+                changed += self._pin_next_snapshot(date, changed)
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO prices VALUES (?, ?, ?, ?, ?, ?)", changed
+                )
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO devices VALUES (?, ?, ?, ?)", devices.values()
+                )
+                self._conn.execute(
+                    "INSERT INTO snapshots VALUES (?, ?, ?, ?)",
+                    (source_digest, date, time.time(), len(changed)),
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return len(changed)
+
+    def _values_as_of(self, date) -> dict:
+        """{(device, condition): (price, depr, pct)} in effect at date (caller holds the lock)."""
+        return {
+            (key, cond): (price, depr, pct)
+            for key, cond, price, depr, pct in self._conn.execute(
+                """
+                SELECT p.device_key, p.condition, p.price, p.depreciation, p.depreciation_pct
+                FROM prices p
+                JOIN (
+                    SELECT device_key, condition, MAX(effective_date) AS effective_date
+                    FROM prices WHERE effective_date <= ?
+                    GROUP BY device_key, condition
+                ) latest USING (device_key, condition, effective_date)
+                """,
+                (date,),
+            )
+        }
+
+    def _pin_next_snapshot(self, date, changed) -> list:
+        """
+        Rows keeping the next later snapshot's values intact when an older
+        export is backfilled: rows written at date would otherwise carry
+        forward past that snapshot wherever it had deduplicated against an
+        earlier value.
+        """
+        row = self._conn.execute(
+            "SELECT MIN(effective_date) FROM snapshots WHERE effective_date > ?", (date,)
+        ).fetchone()
+        next_date = row[0]
+        if next_date is None:
+            return []
+        at_next = self._values_as_of(next_date)
+        explicit = set(self._conn.execute(
+            "SELECT device_key, condition FROM prices WHERE effective_date = ?", (next_date,)
+        ))
+        return [
+            (key, cond, next_date) + at_next.get((key, cond), _MISSING)
+            for key, cond, _, *values in changed
+            if (key, cond) not in explicit and at_next.get((key, cond), _MISSING) != tuple(values)
+        ]
+
+    def ingest(self, excel_path, effective_date=None) -> int:
+        """Ingest a workbook file; the effective date defaults to its modification date."""
+        if effective_date is None:
+            effective_date = datetime.date.fromtimestamp(os.path.getmtime(excel_path))
+        table = sellcell_data.read_excel_table(excel_path)
+        return self.ingest_table(table, sellcell_data.file_digest(excel_path), effective_date)
+
+    def device(self, device_model):
+        """{"name", "brand", "launch_year"} for a device ever seen, or None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT name, brand, launch_year FROM devices WHERE device_key = ?",
+                (sellcell_data.normalize_device_name(device_model),),
+            ).fetchone()
+        return None if row is None else {"name": row[0], "brand": row[1], "launch_year": row[2]}
+
+    def price(self, device_model, condition, as_of):
+        """Top Price of a device in a condition as of a date (None if unknown then)."""
+        with self._lock:
+            row = self._conn.execute(
+                """
+                SELECT price FROM prices
+                WHERE device_key = ? AND condition = ? AND effective_date <= ?
+                ORDER BY effective_date DESC LIMIT 1
+                """,
+                (sellcell_data.normalize_device_name(device_model), condition.title(), _iso_date(as_of)),
+            ).fetchone()
+        return None if row is None else sellcell_data.to_price(row[0])
+
+    def prices(self, device_model, as_of) -> dict:
+        """{condition: Top Price} as of a date."""
+        with self._lock:
+            rows = self._conn.execute(
+                """
+                SELECT p.condition, p.price FROM prices p
+                WHERE p.device_key = ? AND p.effective_date = (
+                    SELECT MAX(effective_date) FROM prices
+                    WHERE device_key = p.device_key AND condition = p.condition AND effective_date <= ?
+                )
+                """,
+                (sellcell_data.normalize_device_name(device_model), _iso_date(as_of)),
+            ).fetchall()
+        return {cond: sellcell_data.to_price(price) for cond, price in rows}
+
+    def snapshot_dates(self) -> list:
+        with self._lock:
+            return [date for (date,) in self._conn.execute(
+                "SELECT DISTINCT effective_date FROM snapshots ORDER BY effective_date"
+            )]
+
+    def series(self, device_model, condition, start=None, end=None) -> list:
+        """
+        [(date, Top Price)] at every snapshot date in [start, end], carrying
+        unchanged prices forward.
+        """
+        start = _iso_date(start) if start is not None else "0000-01-01"
+        end = _iso_date(end) if end is not None else "9999-12-31"
+        with self._lock:
+            changes = self._conn.execute(
+                """
+                SELECT effective_date, price FROM prices
+                WHERE device_key = ? AND condition = ? AND effective_date <= ?
+                ORDER BY effective_date
+                """,
+                (sellcell_data.normalize_device_name(device_model), condition.title(), end),
+            ).fetchall()
+        series, price, i = [], None, 0
+        for date in self.snapshot_dates():
+            while i < len(changes) and changes[i][0] <= date:
+                price = changes[i][1]
+                i += 1
+            if start <= date <= end:
+                series.append((date, sellcell_data.to_price(price)))
+        return series
+
+    def depreciation(self, device_model, condition, start=None, end=None) -> dict:
+        """Change in Top Price between the first and last priced snapshot in [start, end]."""
+        priced = [(date, price) for date, price in self.series(device_model, condition, start, end) if price is not None]
+        if not priced:
+            return {}
+        (first_date, first), (last_date, last) = priced[0], priced[-1]
+        return {
+            "start_date": first_date,
+            "start_price": first,
+            "end_date": last_date,
+            "end_price": last,
+            "change": last - first,
+            "change_pct": (last - first) / first * 100 if first else None,
+        }
+
+
+_history_lock = threading.Lock()
+_history = None
+
+
+def get_price_history(path=HISTORY_PATH) -> PriceHistory:
+    """The process-wide history store (path is only used on first call)."""
+    global _history
+    with _history_lock:
+        if _history is None:
+            _history = PriceHistory(path)
+        return _history
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time-versioned SellCell price history")
+    parser.add_argument("--db", default=HISTORY_PATH)
+    commands = parser.add_subparsers(dest="command", required=True)
+    ingest = commands.add_parser("ingest", help="add a workbook export")
+    ingest.add_argument("path", nargs="?", default=sellcell_data.EXCEL_PATH)
+    ingest.add_argument("--date", help="effective date (YYYY-MM-DD); default: file modification date")
+    price = commands.add_parser("price", help="price as of a date")
+    price.add_argument("device")
+    price.add_argument("condition")
+    price.add_argument("--as-of", default=datetime.date.today().isoformat())
+    series = commands.add_parser("series", help="price at every snapshot, plus depreciation")
+    series.add_argument("device")
+    series.add_argument("condition")
+    series.add_argument("--start")
+    series.add_argument("--end")
+    args = parser.parse_args()
+
+    history = PriceHistory(args.db)
+    if args.command == "ingest":
+        added = history.ingest(args.path, args.date)
+        print(f"Stored {added} changed price rows", file=sys.stderr)
+    elif args.command == "price":
+        print(json.dumps(history.price(args.device, args.condition, args.as_of)))
+    else:
+        print(json.dumps({
+            "series": history.series(args.device, args.condition, args.start, args.end),
+            "depreciation": history.depreciation(args.device, args.condition, args.start, args.end),
+        }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
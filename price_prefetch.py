@@ -0,0 +1,65 @@
+"""
+Speculative resale-price lookups, started as soon as a device is confirmed.
+
+Step 0 calls prefetch_max_price(); by the time the participant has answered
+step 1 the result is normally ready, and step 2 only collects it with
+wait_for_price(). Concurrent prefetches of the same device share one
+computation on a small process-wide thread pool.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+import metrics
+from sellcell_data import get_max_price, normalize_device_name
+
+MAX_WORKERS = 4
+# Seconds step 2 waits for an unfinished prefetch before showing the fallback
+WAIT_TIMEOUT = 2.0
+
+_lock = threading.Lock()
+_executor = None
+# normalized device name → future still running for it
+_inflight = {}
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="price-prefetch")
+    return _executor
+
+
+def prefetch_max_price(device):
+    """Future for get_max_price(device), shared with any identical lookup in flight."""
+    key = normalize_device_name(device)
+    with _lock:
+        future = _inflight.get(key)
+        if future is not None:
+            metrics.inc("price_prefetch_coalesced")
+            return future
+        future = _inflight[key] = _get_executor().submit(get_max_price, device)
+        metrics.inc("price_prefetch_started")
+
+    def done(_):
+        with _lock:
+            if _inflight.get(key) is future:
+                del _inflight[key]
+
+    future.add_done_callback(done)
+    return future
+
+
+def wait_for_price(future, timeout=WAIT_TIMEOUT):
+    """
+    (price, ready): the prefetched max price (None if unknown or the lookup
+    failed) and False if it did not finish within timeout.
+    """
+    with metrics.span("price_prefetch_wait"):
+        try:
+            return future.result(timeout=timeout), True
+        except TimeoutError:
+            metrics.inc("price_prefetch_timeouts")
+            return None, False
+        except Exception:
+            metrics.inc("price_prefetch_errors")
+            return None, True
@@ -0,0 +1,132 @@
+"""
+Shared index of Prolific IDs that have already submitted.
+
+Participants who refresh after a timeout start a new session and would
+otherwise add a second row to the sheet. The index is a SQLite (WAL) table
+with the ID as its key, shared by every worker process on the host, so
+add() is an atomic check-and-reserve: of two sessions submitting the same ID
+at once, on any workers, exactly one gets True. It is warm-loaded once from
+the sheet's existing rows (and from the older prolific_ids.csv, if present).
+"""
+import csv
+import os
+import sqlite3
+import threading
+import time
+
+import metrics
+
+INDEX_PATH = "prolific_ids.db"
+# Flat file used by earlier versions; imported on open
+LEGACY_CSV_PATH = "prolific_ids.csv"
+
+
+def normalize_prolific_id(prolific_id) -> str:
+    return str(prolific_id).strip().lower()
+
+
+def _is_header(key):
+    # The sheet's column header ("ProlificID"), not a participant
+    return key.replace("_", "").replace(" ", "") == "prolificid"
+
+
+class ProlificIndex:
+    def __init__(self, path=INDEX_PATH, legacy_csv_path=LEGACY_CSV_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS prolific_ids (
+                prolific_id TEXT PRIMARY KEY,
+                first_seen REAL NOT NULL
+            ) WITHOUT ROWID
+            """
+        )
+        self._stats = {"checks": 0, "duplicates": 0}
+        if legacy_csv_path and os.path.exists(legacy_csv_path):
+            with open(legacy_csv_path, newline="") as f:
+                self.seed(row["prolific_id"] for row in csv.DictReader(f) if row.get("prolific_id"))
+
+    def __contains__(self, prolific_id):
+        with self._lock:
+            return self._conn.execute(
+                "SELECT 1 FROM prolific_ids WHERE prolific_id = ?", (normalize_prolific_id(prolific_id),)
+            ).fetchone() is not None
+
+    def add(self, prolific_id) -> bool:
+        """
+        Reserve an ID for a submission; returns False if it had already
+        submitted (here or on another worker).
+        """
+        with self._lock:
+            added = self._conn.execute(
+                "INSERT OR IGNORE INTO prolific_ids VALUES (?, ?)",
+                (normalize_prolific_id(prolific_id), time.time()),
+            ).rowcount == 1
+            self._stats["checks"] += 1
+            if not added:
+                self._stats["duplicates"] += 1
+        return added
+
+    def discard(self, prolific_id):
+        """Give back a reservation whose submission could not be queued."""
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM prolific_ids WHERE prolific_id = ?", (normalize_prolific_id(prolific_id),)
+            )
+
+    def seed(self, prolific_ids) -> int:
+        """Merge IDs that are already in the sheet; returns how many were new."""
+        keys = {normalize_prolific_id(i) for i in prolific_ids}
+        now = time.time()
+        with self._lock:
+            before = self._conn.total_changes
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO prolific_ids VALUES (?, ?)",
+                [(key, now) for key in sorted(keys) if key and not _is_header(key)],
+            )
+            return self._conn.total_changes - before
+
+    def stats(self) -> dict:
+        with self._lock:
+            (ids,) = self._conn.execute("SELECT COUNT(*) FROM prolific_ids").fetchone()
+            checks, duplicates = self._stats["checks"], self._stats["duplicates"]
+        return {
+            "ids": ids,
+            "checks": checks,
+            "duplicates": duplicates,
+            "duplicate_rate": duplicates / checks if checks else 0.0,
+        }
+
+
+_index_lock = threading.Lock()
+_index = None
+
+
+def get_prolific_index(get_sheet=None, path=INDEX_PATH) -> ProlificIndex:
+    """
+    The process-wide index. On first use, if get_sheet is given, the sheet's
+    existing ProlificID column is merged in on a background thread.
+    """
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = ProlificIndex(path)
+            index_stats = _index.stats
+            metrics.register_collector(
+                lambda: {f"prolific_index_{name}": value for name, value in index_stats().items()}
+            )
+            if get_sheet is not None:
+                index = _index
+
+                def warm():
+                    try:
+                        index.seed(get_sheet().col_values(1))
+                    except Exception:
+                        pass  # the shared table still covers everything submitted on this host
+
+                threading.Thread(target=warm, name="prolific-index-warm", daemon=True).start()
+        return _index
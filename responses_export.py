@@ -0,0 +1,199 @@
+"""
+Local copy of the "ProlificIDs" responses sheet, for analysis.
+
+    python responses_export.py sync                      # fetch rows added since the last sync
+    python responses_export.py funnel [-o funnel.csv]    # decision × working × brand counts
+    python responses_export.py export -o responses.parquet
+
+sync reads only the rows after the last synced one (ranged reads of
+SYNC_CHUNK rows) and appends them as a new Parquet part under STORE_DIR, so
+history is never downloaded twice. Rows are assumed append-only, which holds
+with Mo_Dash7's default DUPLICATE_POLICY = "reject"; under "upsert", run
+sync --full now and then to pick up rows replaced in place.
+
+Brands are joined from the SellCell catalog when aggregating, not stored, so
+catalog fixes apply to old responses too. Output goes to stdout unless -o is
+given; a .parquet suffix selects Parquet, anything else CSV.
+"""
+import argparse
+import csv
+import json
+import os
+import shutil
+import sys
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+STORE_DIR = "responses"
+SHEET_NAME = "ProlificIDs"
+SECRETS_PATH = os.path.join(".streamlit", "secrets.toml")
+# Rows per ranged read
+SYNC_CHUNK = 5000
+
+# Sheet columns A:E as written by submission_queue (the last is the submission id)
+COLUMNS = ["prolific_id", "device", "decision", "working", "submission_id"]
+SCHEMA = pa.schema([("row", pa.int64())] + [(name, pa.string()) for name in COLUMNS])
+UNKNOWN_BRAND = "Unlisted"
+
+
+def _state_path(store_dir):
+    return os.path.join(store_dir, "sync.json")
+
+
+def _load_state(store_dir) -> dict:
+    try:
+        with open(_state_path(store_dir)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {"last_row": 0, "parts": 0}
+
+
+def _save_state(store_dir, state):
+    tmp_path = _state_path(store_dir) + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(state, f)
+    os.replace(tmp_path, _state_path(store_dir))
+
+
+def _is_header(values):
+    return bool(values) and values[0].strip().lower().replace("_", "").replace(" ", "") == "prolificid"
+
+
+def sync(sheet, store_dir=STORE_DIR, chunk=SYNC_CHUNK) -> int:
+    """Append sheet rows after the last synced one to the store; returns how many were added."""
+    os.makedirs(store_dir, exist_ok=True)
+    state = _load_state(store_dir)
+    added = 0
+    while True:
+        first = state["last_row"] + 1
+        values = sheet.get(f"A{first}:E{first + chunk - 1}")
+        if not values:
+            break
+        rows = [
+            (first + i, [(cells[n] if n < len(cells) else "") for n in range(len(COLUMNS))])
+            for i, cells in enumerate(values)
+        ]
+        rows = [(row, cells) for row, cells in rows if any(cells) and not _is_header(cells)]
+        if rows:
+            table = pa.table(
+                [pa.array([row for row, _ in rows], pa.int64())]
+                + [pa.array([cells[n] for _, cells in rows], pa.string()) for n in range(len(COLUMNS))],
+                schema=SCHEMA,
+            )
+            state["parts"] += 1
+            pq.write_table(table, os.path.join(store_dir, f"part-{state['parts']:06d}.parquet"))
+            added += len(rows)
+        # Trailing empty rows are not returned, so this is the last row that had data
+        state["last_row"] = first + len(values) - 1
+        _save_state(store_dir, state)
+        if len(values) < chunk:
+            break
+    return added
+
+
+def reset(store_dir=STORE_DIR):
+    """Forget everything synced so the next sync re-reads the whole sheet."""
+    shutil.rmtree(store_dir, ignore_errors=True)
+
+
+def iter_batches(store_dir=STORE_DIR, columns=None):
+    """Record batches of every synced row, in sheet order, one part at a time."""
+    if not os.path.isdir(store_dir):
+        return
+    for name in sorted(os.listdir(store_dir)):
+        if name.startswith("part-") and name.endswith(".parquet"):
+            yield from pq.ParquetFile(os.path.join(store_dir, name)).iter_batches(columns=columns)
+
+
+def funnel(store_dir=STORE_DIR) -> pa.Table:
+    """
+    Responses per (decision, working, brand), with each row's share of its
+    brand's responses.
+    """
+    import sellcell_data
+
+    counts = {}
+    for batch in iter_batches(store_dir, columns=["device", "decision", "working"]):
+        for device, decision, working in zip(*(column.to_pylist() for column in batch.columns)):
+            key = (device, decision, working)
+            counts[key] = counts.get(key, 0) + 1
+
+    records = sellcell_data.get_sellcell_prices(sorted({device for device, _, _ in counts}))
+    by_brand = {}
+    for (device, decision, working), n in counts.items():
+        brand = records[device]["brand"] if device in records else UNKNOWN_BRAND
+        key = (decision, working, brand)
+        by_brand[key] = by_brand.get(key, 0) + n
+
+    brand_totals = {}
+    for (_, _, brand), n in by_brand.items():
+        brand_totals[brand] = brand_totals.get(brand, 0) + n
+    keys = sorted(by_brand, key=lambda k: (k[2], k[0], k[1]))
+    return pa.table({
+        "brand": [k[2] for k in keys],
+        "decision": [k[0] for k in keys],
+        "working": [k[1] for k in keys],
+        "responses": pa.array([by_brand[k] for k in keys], pa.int64()),
+        "share_of_brand": [by_brand[k] / brand_totals[k[2]] for k in keys],
+    })
+
+
+def write_output(batches, schema, out=None):
+    """Stream record batches to out (.parquet → Parquet, else CSV; None → CSV on stdout)."""
+    if out and out.endswith(".parquet"):
+        with pq.ParquetWriter(out, schema) as writer:
+            for batch in batches:
+                writer.write_batch(batch)
+        return
+    f = open(out, "w", newline="") if out else sys.stdout
+    try:
+        writer = csv.writer(f)
+        writer.writerow(schema.names)
+        for batch in batches:
+            writer.writerows(zip(*(column.to_pylist() for column in batch.columns)))
+    finally:
+        if out:
+            f.close()
+
+
+def _open_sheet(secrets_path):
+    import tomllib
+
+    from oauth2client.service_account import ServiceAccountCredentials
+
+    from sheets_pool import get_pool
+
+    with open(secrets_path, "rb") as f:
+        sa_info = tomllib.load(f)["google_service_account"]
+    scope = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
+    return get_pool(lambda: ServiceAccountCredentials.from_json_keyfile_dict(sa_info, scope)).worksheet(SHEET_NAME)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sync and aggregate the ProlificIDs responses sheet")
+    parser.add_argument("--store", default=STORE_DIR, help="local Parquet store directory")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    sync_parser = commands.add_parser("sync", help="fetch rows added since the last sync")
+    sync_parser.add_argument("--secrets", default=SECRETS_PATH, help="TOML file with [google_service_account]")
+    sync_parser.add_argument("--full", action="store_true", help="drop the local copy and re-read the whole sheet")
+    for name, help_text in (("funnel", "decision × working × brand counts"), ("export", "every synced row")):
+        command = commands.add_parser(name, help=help_text)
+        command.add_argument("-o", "--out", help="output file (.parquet or .csv); default CSV on stdout")
+    args = parser.parse_args()
+
+    if args.command == "sync":
+        if args.full:
+            reset(args.store)
+        added = sync(_open_sheet(args.secrets), args.store)
+        print(f"Synced {added} new rows (through sheet row {_load_state(args.store)['last_row']})", file=sys.stderr)
+    elif args.command == "funnel":
+        table = funnel(args.store)
+        write_output(table.to_batches(), table.schema, args.out)
+    else:
+        write_output(iter_batches(args.store), SCHEMA, args.out)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,76 +1,714 @@
-import pandas as pd
+import datetime
+import hashlib
+import io
+import math
+import os
+import re
+import threading
+import time
+
+import metrics
+import sellcell_snapshot
 
 EXCEL_PATH = "SellCell.xlsx"
+SNAPSHOT_PATH = "SellCell.snapshot"
+
+# The parsed workbook is cached once per server process and shared by every
+# Streamlit session/thread. It is only re-read when the file on disk changes.
+_cache_lock = threading.Lock()
+# Serializes (re)loads so only one thread parses at a time; readers never take it
+# once the background watcher is running
+_load_lock = threading.Lock()
+_catalog = None
+_watcher = None
+_watcher_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "reloads": 0, "snapshot_loads": 0, "incremental_reloads": 0, "sheets_reparsed": 0}
+
+# Seconds between checks of SellCell.xlsx by the background watcher
+WATCH_INTERVAL = 30
+
+# SQLite file collecting every workbook version (see price_history.py); off unless set
+PRICE_HISTORY_PATH = os.environ.get("MO_PRICE_HISTORY")
+# digest → catalog installed but not yet added to the history
+_history_pending = {}
+# Callbacks the watcher runs after installing a catalog (see add_reload_hook)
+_reload_hooks = []
+
+# Trailing storage size in a device name, e.g. "iPhone 16 Pro 128GB"
+_STORAGE_RE = re.compile(r"\s*(\d+\s*[GT]B)$", re.IGNORECASE)
+
+# Conditions a working phone can be resold in (Step 2's "can fetch up to $X")
+RESALE_CONDITIONS = ("Mint", "Good", "Fair", "Poor")
+
+# Per-condition metrics kept from the second header row
+METRICS = ("Top Price", "Depr.", "%")
+
+
+def normalize_device_name(name) -> str:
+    return str(name).lower().strip()
+
+
+def _normalize_storage(storage) -> str:
+    return str(storage).lower().replace(" ", "")
+
+
+def _to_float(value):
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return math.nan
+    return value
+
+
+def to_price(value):
+    """A workbook number as a price: None if missing, int if whole."""
+    if value is None or math.isnan(value):
+        return None
+    return int(value) if value.is_integer() else value
+
+
+class CatalogTable:
+    """
+    Columnar view of the workbook, one entry per device row in sheet order.
+    Columns are plain lists when parsed from SellCell.xlsx and memoryviews
+    over the mmap'd file when loaded from a snapshot.
+
+    values is flat: values[(row * len(conditions) + cond) * len(METRICS) + metric]
+    """
+
+    def __init__(self, brands, conditions, brand_idx, names, msrp, launch_year, values, max_price):
+        self.brands = brands
+        self.conditions = conditions
+        self.brand_idx = brand_idx
+        self.names = names
+        self.msrp = msrp
+        self.launch_year = launch_year
+        self.values = values
+        self.max_price = max_price
+
+    def __len__(self):
+        return len(self.names)
+
+    def value(self, row, cond, metric=0):
+        return self.values[(row * len(self.conditions) + cond) * len(METRICS) + metric]
+
+
+def read_excel_table(path=EXCEL_PATH) -> CatalogTable:
+    """Parse SellCell.xlsx into a CatalogTable (needs pandas/openpyxl)."""
+    import pandas as pd
 
-def load_sellcell_data():
     # Read Excel with two header rows (condition, metric)
-    sheets = pd.read_excel(EXCEL_PATH, sheet_name=None, header=[0,1])
-    return sheets
+    sheets = pd.read_excel(path, sheet_name=None, header=[0,1])
+    return _table_from_sheets(sheets)
 
-def get_device_column(df):
+
+def _table_from_sheets(sheets) -> CatalogTable:
+    return _concat_tables([_sheet_table(brand, df) for brand, df in sheets.items()])
+
+
+def _sheet_table(brand, df) -> CatalogTable:
+    """CatalogTable for one brand sheet."""
+    # Keep the workbook's column order (Mint, Good, ...) rather than the sorted levels
+    order = [col[0] for col in df.columns]
+    conditions = sorted(get_all_conditions(df), key=order.index)
+
+    device_col = get_device_column(df)
+    msrp_col = _find_column(df, "msrp")
+    year_col = _find_column(df, "launch year")
+    n = len(df)
+
+    # One vectorized pass per (condition, metric) column
+    columns = {}
+    for cond in conditions:
+        for metric in METRICS:
+            col = (cond, metric)
+            columns[col] = df[col].tolist() if col in df.columns else [None] * n
+    resale = [(cond, "Top Price") for cond in RESALE_CONDITIONS if (cond, "Top Price") in df.columns]
+    resale_max = df[resale].max(axis=1).tolist() if resale else [None] * n
+    msrps = df[msrp_col].tolist() if msrp_col is not None else [None] * n
+    years = df[year_col].tolist() if year_col is not None else [None] * n
+
+    names, msrp, launch_year, values, max_price = [], [], [], [], []
+    for pos, name in enumerate(df[device_col].tolist()):
+        if not isinstance(name, str) and _to_float(name) != _to_float(name):
+            continue  # empty Device cell
+        names.append(str(name))
+        msrp.append(_to_float(msrps[pos]))
+        year = _to_float(years[pos])
+        launch_year.append(0 if math.isnan(year) else int(year))
+        for cond in conditions:
+            for metric in METRICS:
+                values.append(_to_float(columns[(cond, metric)][pos]))
+        max_price.append(_to_float(resale_max[pos]))
+
+    return CatalogTable([brand], conditions, [0] * len(names), names, msrp, launch_year, values, max_price)
+
+
+def _split_table(table) -> dict:
+    """{brand: single-brand CatalogTable} from a (possibly snapshot-backed) table."""
+    rows = {brand: [] for brand in table.brands}
+    for pos in range(len(table)):
+        rows[table.brands[table.brand_idx[pos]]].append(pos)
+    width = len(table.conditions) * len(METRICS)
+    return {
+        brand: CatalogTable(
+            [brand], list(table.conditions), [0] * len(positions),
+            [table.names[pos] for pos in positions],
+            [table.msrp[pos] for pos in positions],
+            [table.launch_year[pos] for pos in positions],
+            [v for pos in positions for v in table.values[pos * width:(pos + 1) * width]],
+            [table.max_price[pos] for pos in positions],
+        )
+        for brand, positions in rows.items()
+    }
+
+
+def _concat_tables(tables) -> CatalogTable:
+    """Stack single-brand tables in order, over the union of their conditions."""
+    conditions = []
+    for table in tables:
+        for cond in table.conditions:
+            if cond not in conditions:
+                conditions.append(cond)
+
+    brands, brand_idx, names, msrp, launch_year, values, max_price = [], [], [], [], [], [], []
+    nan = float("nan")
+    for b, table in enumerate(tables):
+        brands.append(table.brands[0])
+        cond_pos = [table.conditions.index(cond) if cond in table.conditions else None for cond in conditions]
+        for row in range(len(table)):
+            brand_idx.append(b)
+            names.append(table.names[row])
+            msrp.append(table.msrp[row])
+            launch_year.append(table.launch_year[row])
+            for c in cond_pos:
+                for metric in range(len(METRICS)):
+                    values.append(nan if c is None else table.value(row, c, metric))
+            max_price.append(table.max_price[row])
+
+    return CatalogTable(brands, conditions, brand_idx, names, msrp, launch_year, values, max_price)
+
+
+class _Catalog:
+    def __init__(self, table, signature, digest, sheets=None, fingerprints=None):
+        self.table = table
+        self.signature = signature
+        self.digest = digest
+        self._sheets = sheets
+        # {sheet name: content digest}, to tell which sheets a refresh touched
+        self.fingerprints = fingerprints
+        # normalized device name → row position in the table
+        self.index = {}
+        # normalized device family (name without storage) → {storage: normalized name}
+        self.families = {}
+        self.devices = []
+        self._build_index()
+
+    def _build_index(self):
+        for pos, name in enumerate(self.table.names):
+            key = normalize_device_name(name)
+            # First match wins, like the old per-sheet scan
+            if key in self.index:
+                continue
+            self.index[key] = pos
+            self.devices.append(name)
+
+            match = _STORAGE_RE.search(key)
+            if match:
+                family = key[:match.start()].strip()
+                storage = _normalize_storage(match.group(1))
+                self.families.setdefault(family, {}).setdefault(storage, key)
+
+    def find(self, device_model, storage=None):
+        """Return the normalized name of a device (and storage variant), or None."""
+        key = normalize_device_name(device_model)
+        if storage:
+            wanted = _normalize_storage(storage)
+            # Exact name already carries the storage, e.g. "Pixel 8 128GB" + "128GB"
+            if key in self.index and wanted in key.replace(" ", ""):
+                return key
+            return self.families.get(key, {}).get(wanted)
+        return key if key in self.index else None
+
+    def record(self, key):
+        """{"brand", "msrp", "launch_year", "prices", "max_price"} for a normalized name."""
+        pos = self.index.get(key)
+        if pos is None:
+            return None
+        table = self.table
+        year = table.launch_year[pos]
+        return {
+            "brand": table.brands[table.brand_idx[pos]],
+            "msrp": to_price(table.msrp[pos]),
+            "launch_year": year or None,
+            "prices": {cond: to_price(table.value(pos, c)) for c, cond in enumerate(table.conditions)},
+            "max_price": to_price(table.max_price[pos]),
+        }
+
+
+def _file_signature(path):
+    stat = os.stat(path)
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def file_digest(path):
+    """sha256 of a file, as used for catalog versions."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _load_snapshot(signature, digest):
+    """
+    Return a catalog from SNAPSHOT_PATH if it was built from this exact
+    workbook, with the sheet fingerprints recorded when it was built.
+    """
+    if not os.path.exists(SNAPSHOT_PATH):
+        return None
+    try:
+        snapshot = sellcell_snapshot.load_snapshot(SNAPSHOT_PATH)
+    except (OSError, ValueError):
+        return None
+    if snapshot.source_digest != digest:
+        return None
+    return _Catalog(snapshot.table, signature, digest, fingerprints=snapshot.fingerprints)
+
+
+_XLSX_NS = {
+    "main": "http://schemas.openxmlformats.org/spreadsheetml/2006/main",
+    "rel": "http://schemas.openxmlformats.org/package/2006/relationships",
+}
+_R_ID = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}id"
+
+
+def _sheet_cells(data, strings):
+    """(cell ref, value) for every non-empty cell of a worksheet part."""
+    import xml.etree.ElementTree as ET
+
+    main = _XLSX_NS["main"]
+    for cell in ET.fromstring(data).iter(f"{{{main}}}c"):
+        kind = cell.get("t")
+        v = cell.find(f"{{{main}}}v")
+        if kind == "inlineStr":
+            value = "".join(t.text or "" for t in cell.iter(f"{{{main}}}t"))
+        elif v is None or v.text is None:
+            continue
+        elif kind == "s":
+            value = strings[int(v.text)]
+        elif kind in (None, "n"):
+            value = repr(float(v.text))  # "2024" and "2024.0" are the same number
+        else:
+            value = v.text
+        yield cell.get("r"), value
+
+
+def sheet_fingerprints(path=EXCEL_PATH) -> dict:
+    """
+    {sheet name: digest of its cell values} in workbook order, read straight
+    from the xlsx zip without pandas. Values rather than raw XML are hashed, so
+    a re-save that rewrites every part only flags the sheets whose data changed.
+    """
+    import xml.etree.ElementTree as ET
+    import zipfile
+
+    with zipfile.ZipFile(path) as xlsx:
+        workbook = ET.fromstring(xlsx.read("xl/workbook.xml"))
+        rels = ET.fromstring(xlsx.read("xl/_rels/workbook.xml.rels"))
+        targets = {rel.get("Id"): rel.get("Target") for rel in rels.iterfind("rel:Relationship", _XLSX_NS)}
+        strings = []
+        if "xl/sharedStrings.xml" in xlsx.namelist():
+            shared = ET.fromstring(xlsx.read("xl/sharedStrings.xml"))
+            t_tag = f"{{{_XLSX_NS['main']}}}t"
+            strings = ["".join(t.text or "" for t in si.iter(t_tag)) for si in shared]
+
+        fingerprints = {}
+        for sheet in workbook.iterfind("main:sheets/main:sheet", _XLSX_NS):
+            target = targets[sheet.get(_R_ID)]
+            member = target.lstrip("/") if target.startswith("/") else "xl/" + target
+            h = hashlib.sha256()
+            for ref, value in _sheet_cells(xlsx.read(member), strings):
+                h.update(f"{ref}\0{value}\0".encode("utf-8"))
+            fingerprints[sheet.get("name")] = h.hexdigest()
+        return fingerprints
+
+
+def _build_catalog(signature, digest, previous=None):
+    """
+    Load the catalog for the workbook now on disk: from the snapshot if it
+    matches, else by parsing only the sheets whose contents differ from
+    previous (all of them on a cold start).
+    """
+    start = time.perf_counter()
+    catalog = _load_snapshot(signature, digest)
+    if catalog is not None:
+        metrics.observe("sellcell_catalog_load", time.perf_counter() - start, source="snapshot")
+        with _cache_lock:
+            _stats["snapshot_loads"] += 1
+        return catalog
+
+    # Only read now that the workbook has to be parsed anyway; the snapshot
+    # carries its own, so a cold start from it never unzips the workbook
+    try:
+        fingerprints = sheet_fingerprints(EXCEL_PATH)
+    except Exception:
+        fingerprints = None  # not a readable xlsx zip; let pandas report it
+
+    old = previous.fingerprints if previous is not None else None
+    if fingerprints is None or not old:
+        changed = None
+    else:
+        changed = [brand for brand, fp in fingerprints.items() if old.get(brand) != fp]
+
+    import pandas as pd
+    if changed is None:
+        with metrics.span("sellcell_catalog_load", source="xlsx"):
+            sheets = pd.read_excel(EXCEL_PATH, sheet_name=None, header=[0,1])
+            return _Catalog(_table_from_sheets(sheets), signature, digest, sheets, fingerprints)
+
+    with metrics.span("sellcell_catalog_load", source="incremental"):
+        parsed = pd.read_excel(EXCEL_PATH, sheet_name=changed, header=[0,1]) if changed else {}
+        tables = _split_table(previous.table)
+        tables.update({brand: _sheet_table(brand, df) for brand, df in parsed.items()})
+        table = _concat_tables([tables[brand] for brand in fingerprints])
+        sheets = None
+        if previous._sheets is not None:
+            sheets = {brand: parsed[brand] if brand in parsed else previous._sheets[brand] for brand in fingerprints}
+        with _cache_lock:
+            _stats["incremental_reloads"] += 1
+            _stats["sheets_reparsed"] += len(changed)
+        return _Catalog(table, signature, digest, sheets, fingerprints)
+
+
+def _install(catalog):
+    """Swap in a newly built catalog and queue its workbook for the price history."""
+    global _catalog
+    with _cache_lock:
+        _catalog = catalog
+        if PRICE_HISTORY_PATH:
+            _history_pending[catalog.digest] = catalog
+
+
+def _get_catalog():
+    # With the watcher running, changes are picked up in the background and
+    # requests never stat, hash or parse the workbook
+    current = _catalog
+    if current is not None and _watcher is not None:
+        with _cache_lock:
+            _stats["hits"] += 1
+        return current
+
+    signature = _file_signature(EXCEL_PATH)
+    with _load_lock:
+        with _cache_lock:
+            if _catalog is not None and _catalog.signature == signature:
+                _stats["hits"] += 1
+                return _catalog
+
+        # mtime/size changed: only re-parse if the contents really did
+        digest = file_digest(EXCEL_PATH)
+        with _cache_lock:
+            if _catalog is not None and _catalog.digest == digest:
+                _catalog.signature = signature
+                _stats["hits"] += 1
+                return _catalog
+            _stats["misses"] += 1
+            if _catalog is not None:
+                _stats["reloads"] += 1
+
+        catalog = _build_catalog(signature, digest, _catalog)
+        _install(catalog)
+        return catalog
+
+
+def reload_catalog() -> bool:
+    """
+    Re-check the workbook and, if its contents changed, build the new catalog
+    and swap it in. Returns True if a new catalog was installed. Readers keep
+    whichever catalog object they already hold, so a lookup never sees a mix
+    of old and new data.
+    """
+    signature = _file_signature(EXCEL_PATH)
+    with _load_lock:
+        previous = _catalog
+        if previous is not None and previous.signature == signature:
+            return False
+        digest = file_digest(EXCEL_PATH)
+        if previous is not None and previous.digest == digest:
+            previous.signature = signature
+            return False
+        catalog = _build_catalog(signature, digest, previous)
+        with _cache_lock:
+            if previous is not None:
+                _stats["reloads"] += 1
+        _install(catalog)
+        return True
+
+
+class CatalogWatcher(threading.Thread):
+    """Polls SellCell.xlsx and reloads the catalog off the request path."""
+
+    def __init__(self, interval=WATCH_INTERVAL):
+        super().__init__(name="sellcell-watcher", daemon=True)
+        self.interval = interval
+        self._stop_event = threading.Event()
+
+    def run(self):
+        # Derived data for the catalog loaded by start_catalog_watcher()
+        _run_reload_hooks()
+        while True:
+            try:
+                _record_history()
+            except Exception:
+                metrics.inc("sellcell_watcher_errors")
+            if self._stop_event.wait(self.interval):
+                return
+            try:
+                reloaded = reload_catalog()
+            except Exception:
+                # e.g. the workbook is mid-write; keep serving the current catalog
+                metrics.inc("sellcell_watcher_errors")
+                continue
+            if reloaded:
+                _run_reload_hooks()
+
+    def stop(self):
+        self._stop_event.set()
+
+
+def add_reload_hook(callback):
+    """
+    Have the watcher call callback() after it installs a catalog, so data
+    derived from it (e.g. the search index) is rebuilt off the request path.
+    """
+    _reload_hooks.append(callback)
+
+
+def _run_reload_hooks():
+    for hook in list(_reload_hooks):
+        try:
+            hook()
+        except Exception:
+            metrics.inc("sellcell_watcher_errors")
+
+
+def _record_history():
+    """
+    Add every workbook version installed since the last call to the price
+    history, dated by its modification time. Runs on the watcher thread, so
+    the write transaction never delays a request.
+    """
+    from price_history import get_price_history
+
+    with _cache_lock:
+        pending = list(_history_pending.values())
+        _history_pending.clear()
+    for catalog in pending:
+        effective_date = datetime.date.fromtimestamp(catalog.signature[0] / 1e9)
+        get_price_history(PRICE_HISTORY_PATH).ingest_table(catalog.table, catalog.digest, effective_date)
+
+
+def start_catalog_watcher(interval=WATCH_INTERVAL) -> CatalogWatcher:
+    """
+    Load the catalog now and keep it fresh from a background thread (once per
+    process). With MO_PRICE_HISTORY set, every workbook version loaded is also
+    added to the price history from that thread.
+    """
+    global _watcher
+    # Called from the top of the app script: after the first call this must
+    # not touch the file or any lock a reload holds
+    if _watcher is not None:
+        return _watcher
+    with _watcher_lock:
+        if _watcher is None:
+            reload_catalog()
+            watcher = CatalogWatcher(interval)
+            watcher.start()
+            _watcher = watcher
+        return _watcher
+
+
+@metrics.timed("sellcell_load_sellcell_data")
+def load_sellcell_data():
+    """
+    Return the parsed SellCell workbook ({brand: DataFrame}).
+    The result is shared across sessions, so callers must not mutate it.
+    """
+    catalog = _get_catalog()
+    if catalog._sheets is not None:
+        return catalog._sheets
+    # Snapshot-backed catalogs only parse the workbook if someone asks for the
+    # DataFrames; the parse is slow, so it runs outside _cache_lock
+    with _load_lock:
+        if catalog._sheets is not None:
+            return catalog._sheets
+        import pandas as pd
+        with open(EXCEL_PATH, "rb") as f:
+            data = f.read()
+        sheets = pd.read_excel(io.BytesIO(data), sheet_name=None, header=[0,1])
+        # The file may have been replaced since the catalog was built; those
+        # DataFrames belong to the next catalog, so don't cache them on this one
+        if hashlib.sha256(data).hexdigest() == catalog.digest:
+            catalog._sheets = sheets
+        return sheets
+
+
+def get_catalog_version() -> str:
+    """sha256 of the workbook the current catalog was built from."""
+    return _get_catalog().digest
+
+
+def get_catalog_table():
+    """
+    (CatalogTable, sha256 of its workbook) for the current catalog, read
+    from one catalog object so the two always match. Callers must not mutate it.
+    """
+    catalog = _get_catalog()
+    return catalog.table, catalog.digest
+
+
+def get_cache_stats() -> dict:
+    """
+    hits           → calls served from the in-memory catalog
+    misses         → calls that had to load the catalog
+    reloads        → misses caused by the workbook changing on disk
+    snapshot_loads → misses served from SellCell.snapshot instead of the xlsx
+    incremental_reloads → reloads that re-parsed only the changed sheets
+    sheets_reparsed     → sheets parsed by those incremental reloads
+    """
+    with _cache_lock:
+        return dict(_stats)
+
+def _find_column(df, name):
     for col in df.columns:
-        if (isinstance(col, tuple) and col[0].lower() == "device") or (isinstance(col, str) and col.lower() == "device"):
+        if (isinstance(col, tuple) and col[0].lower() == name) or (isinstance(col, str) and col.lower() == name):
             return col
-    raise KeyError(f"Could not find 'Device' column in columns: {df.columns.tolist()}")
+    return None
 
+def get_device_column(df):
+    col = _find_column(df, "device")
+    if col is None:
+        raise KeyError(f"Could not find 'Device' column in columns: {df.columns.tolist()}")
+    return col
+
+@metrics.timed("sellcell_get_all_devices")
 def get_all_devices():
-    sheets = load_sellcell_data()
-    devices = set()
-    for df in sheets.values():
-        device_col = get_device_column(df)
-        devices.update(str(x) for x in df[device_col].dropna().unique())
-    return list(devices)
+    return list(_get_catalog().devices)
 
 def get_all_conditions(df):
     return [cond for cond in df.columns.levels[0] if cond not in ("Device", "MSRP", "Launch Year")]
 
-def get_sellcell_price(device_model: str, condition: str = None, storage: str = None, mode: str = "exact") -> dict:
+@metrics.timed("sellcell_get_sellcell_price")
+def get_sellcell_price(device_model: str, condition: str = None, storage: str = None, mode: str = "exact", as_of=None) -> dict:
     """
     mode = "exact" → return price for a given condition
     mode = "max"   → return highest price across all conditions
+    as_of          → answer from the price history as of that date instead
+                     of the current workbook (see price_history.py)
     """
-    sheets = load_sellcell_data()
     if condition:
         condition = condition.title()
 
-    for brand, df in sheets.items():
-        device_col = get_device_column(df)
-        # Match device row (and storage if provided)
-        mask = df[device_col].astype(str).str.lower().str.strip() == device_model.lower().strip()
-        if storage:
-            mask &= df[device_col].astype(str).str.contains(storage, case=False, na=False)
-
-        row = df[mask]
-        if not row.empty:
-            msrp = row.iloc[0].get(('MSRP', ''), "")
-            launch_year = row.iloc[0].get(('Launch Year', ''), "")
-
-            if mode == "max":
-                max_price = None
-                for cond in df.columns.levels[0]:
-                    if cond in ("Device", "MSRP", "Launch Year"):
-                        continue
-                    try:
-                        price = row.iloc[0][(cond, "Top Price")]
-                        if pd.notna(price) and (max_price is None or price > max_price):
-                            max_price = price
-                    except Exception:
-                        continue
-                return {"price": max_price, "msrp": msrp, "launch_year": launch_year, "brand": brand}
-
-            elif condition:
-                try:
-                    price = row.iloc[0][(condition, "Top Price")]
-                    #depr = row.iloc[0][(condition, "Depr.")]
-                    #depr_pct = row.iloc[0][(condition, "%")]
-                except KeyError:
-                    return {}
-                return {
-                    "price": price,
-                    #"depreciation": depr,
-                    #"depreciation_pct": depr_pct,
-                    #"msrp": msrp,
-                    "launch_year": launch_year,
-                    "brand": brand
-                }
+    # Match device row (and storage if provided) via the prebuilt index
+    catalog = _get_catalog()
+    key = catalog.find(device_model, storage)
+    if as_of is not None:
+        return _historical_price(key or device_model, condition, mode, as_of)
+    if key is None:
+        return {}
+    record = catalog.record(key)
+    brand = record["brand"]
+    msrp = record["msrp"]
+    launch_year = record["launch_year"]
+
+    if mode == "max":
+        prices = [p for p in record["prices"].values() if p is not None]
+        max_price = max(prices) if prices else None
+        return {"price": max_price, "msrp": msrp, "launch_year": launch_year, "brand": brand}
+
+    elif condition:
+        try:
+            price = record["prices"][condition]
+            #depr = catalog.table.value(pos, cond, METRICS.index("Depr."))
+            #depr_pct = catalog.table.value(pos, cond, METRICS.index("%"))
+        except KeyError:
+            return {}
+        return {
+            "price": price,
+            #"depreciation": depr,
+            #"depreciation_pct": depr_pct,
+            #"msrp": msrp,
+            "launch_year": launch_year,
+            "brand": brand
+        }
     return {}
+
+
+def _historical_price(device_model, condition, mode, as_of) -> dict:
+    import price_history
+
+    history = price_history.get_price_history(PRICE_HISTORY_PATH or price_history.HISTORY_PATH)
+    device = history.device(device_model)
+    if device is None:
+        return {}
+    if mode == "max":
+        prices = [p for p in history.prices(device_model, as_of).values() if p is not None]
+        return {
+            "price": max(prices) if prices else None,
+            "launch_year": device["launch_year"],
+            "brand": device["brand"],
+        }
+    elif condition:
+        return {
+            "price": history.price(device_model, condition, as_of),
+            "launch_year": device["launch_year"],
+            "brand": device["brand"],
+        }
+    return {}
+
+
+@metrics.timed("sellcell_get_max_price")
+def get_max_price(device_model: str):
+    """
+    Highest Top Price across RESALE_CONDITIONS, precomputed at catalog load.
+    Returns None for unknown devices.
+    """
+    catalog = _get_catalog()
+    pos = catalog.index.get(normalize_device_name(device_model))
+    return None if pos is None else to_price(catalog.table.max_price[pos])
+
+
+@metrics.timed("sellcell_get_sellcell_prices")
+def get_sellcell_prices(devices, conditions=None) -> dict:
+    """
+    Batch lookup for one or many devices.
+    Returns {device: {"prices": {condition: Top Price}, "max_price", "msrp",
+    "launch_year", "brand"}}; unknown devices are left out.
+    """
+    if isinstance(devices, str):
+        devices = [devices]
+    if conditions:
+        conditions = [cond.title() for cond in conditions]
+
+    catalog = _get_catalog()
+    result = {}
+    for device in devices:
+        record = catalog.record(normalize_device_name(device))
+        if record is None:
+            continue
+        if conditions:
+            record["prices"] = {cond: record["prices"][cond] for cond in conditions if cond in record["prices"]}
+        result[device] = record
+    return result
+
+
+def _cache_metrics():
+    stats = get_cache_stats()
+    lookups = stats["hits"] + stats["misses"]
+    gauges = {f"sellcell_cache_{name}": value for name, value in stats.items()}
+    gauges["sellcell_cache_hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+    return gauges
+
+
+metrics.register_collector(_cache_metrics)
@@ -0,0 +1,162 @@
+"""
+Compiled binary snapshot of SellCell.xlsx.
+
+The workbook is compiled once into a columnar file of typed arrays that can be
+mmap'd without importing pandas/openpyxl, so every worker process shares one
+page-cache copy. Build it after refreshing the workbook:
+
+    python sellcell_snapshot.py [SellCell.xlsx] [SellCell.snapshot]
+
+Layout (little-endian, sections 8-byte aligned):
+    MAGIC | uint32 header length | JSON header | sections...
+The header records the source workbook's sha256 so stale snapshots are ignored,
+and its per-sheet fingerprints so the first reload after a cold start from the
+snapshot only re-parses the sheets that changed.
+"""
+import array
+import json
+import mmap
+import os
+import struct
+import sys
+
+MAGIC = b"MOSNAP01"
+
+# section name → array typecode
+_SECTIONS = {
+    "brand_idx": "H",
+    "name_offsets": "I",
+    "names": "B",
+    "msrp": "d",
+    "launch_year": "i",
+    "values": "d",
+    "max_price": "d",
+}
+
+
+class Snapshot:
+    def __init__(self, mm, header, table):
+        self._mmap = mm  # keeps the memoryviews in table valid
+        self.header = header
+        self.source_digest = header["source_digest"]
+        # {sheet name: content digest}, or None for snapshots written without them
+        self.fingerprints = header.get("fingerprints")
+        self.table = table
+
+
+def _pad(n):
+    return (-n) % 8
+
+
+def write_snapshot(table, source_digest, out_path, fingerprints=None):
+    """Serialize a sellcell_data.CatalogTable to out_path (atomically)."""
+    encoded = [name.encode("utf-8") for name in table.names]
+    offsets = [0]
+    for name in encoded:
+        offsets.append(offsets[-1] + len(name))
+
+    arrays = {
+        "brand_idx": array.array("H", table.brand_idx),
+        "name_offsets": array.array("I", offsets),
+        "names": array.array("B", b"".join(encoded)),
+        "msrp": array.array("d", table.msrp),
+        "launch_year": array.array("i", table.launch_year),
+        "values": array.array("d", table.values),
+        "max_price": array.array("d", table.max_price),
+    }
+    if sys.byteorder != "little":
+        for arr in arrays.values():
+            arr.byteswap()
+
+    header = {
+        "source_digest": source_digest,
+        "rows": len(table.names),
+        "brands": list(table.brands),
+        "conditions": list(table.conditions),
+        "fingerprints": fingerprints,
+        "sections": {},
+    }
+    # Header size depends on the offsets it contains, so grow the reserved header
+    # space until the section offsets fit in it.
+    start = 0
+    while True:
+        offset = start
+        for name, arr in arrays.items():
+            size = len(arr) * arr.itemsize
+            header["sections"][name] = [offset, size]
+            offset += size + _pad(size)
+        header_bytes = json.dumps(header).encode("utf-8")
+        needed = len(MAGIC) + 4 + len(header_bytes)
+        if needed <= start:
+            break
+        start = needed + _pad(needed)
+    header_bytes += b" " * (start - len(MAGIC) - 4 - len(header_bytes))
+
+    tmp_path = out_path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<I", len(header_bytes)))
+        f.write(header_bytes)
+        for arr in arrays.values():
+            data = arr.tobytes()
+            f.write(data)
+            f.write(b"\0" * _pad(len(data)))
+    os.replace(tmp_path, out_path)
+
+
+def load_snapshot(path) -> Snapshot:
+    """mmap a snapshot file; raises ValueError if it is not a valid snapshot."""
+    from sellcell_data import CatalogTable
+
+    if sys.byteorder != "little":
+        raise ValueError("snapshots are only readable on little-endian hosts")
+
+    with open(path, "rb") as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if mm[:len(MAGIC)] != MAGIC:
+        mm.close()
+        raise ValueError(f"{path} is not a SellCell snapshot")
+    (header_len,) = struct.unpack_from("<I", mm, len(MAGIC))
+    header_start = len(MAGIC) + 4
+    header = json.loads(bytes(mm[header_start:header_start + header_len]))
+
+    view = memoryview(mm)
+    columns = {}
+    for name, typecode in _SECTIONS.items():
+        offset, size = header["sections"][name]
+        columns[name] = view[offset:offset + size].cast(typecode)
+
+    # Names are decoded once; everything else stays in the shared mapping
+    offsets, blob = columns["name_offsets"], columns["names"]
+    names = [
+        sys.intern(bytes(blob[offsets[i]:offsets[i + 1]]).decode("utf-8"))
+        for i in range(header["rows"])
+    ]
+    table = CatalogTable(
+        brands=[sys.intern(b) for b in header["brands"]],
+        conditions=[sys.intern(c) for c in header["conditions"]],
+        brand_idx=columns["brand_idx"],
+        names=names,
+        msrp=columns["msrp"],
+        launch_year=columns["launch_year"],
+        values=columns["values"],
+        max_price=columns["max_price"],
+    )
+    return Snapshot(mm, header, table)
+
+
+def build_snapshot(excel_path=None, out_path=None):
+    import sellcell_data
+
+    excel_path = excel_path or sellcell_data.EXCEL_PATH
+    out_path = out_path or sellcell_data.SNAPSHOT_PATH
+    table = sellcell_data.read_excel_table(excel_path)
+    write_snapshot(
+        table, sellcell_data.file_digest(excel_path), out_path, sellcell_data.sheet_fingerprints(excel_path)
+    )
+    return out_path
+
+
+if __name__ == "__main__":
+    out = build_snapshot(*sys.argv[1:3])
+    print(f"Wrote {out}")
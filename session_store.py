@@ -0,0 +1,179 @@
+"""
+Shared store for wizard progress, so a session can resume after a refresh,
+a worker restart, or on another worker behind a load balancer.
+
+State is keyed by a resumable token (the Prolific ID from the study link, or
+a generated ?session= URL parameter). Saves are coalesced in memory and
+written by a background thread, so repeated saves from one participant cost
+one write per flush; sessions idle for longer than the TTL are evicted.
+
+SQLiteSessionStore works for any number of processes on one host. Other
+backends (e.g. Redis for several hosts) only need load()/save() and can be
+installed with set_session_store().
+"""
+import abc
+import json
+import secrets
+import sqlite3
+import threading
+import time
+
+import metrics
+
+SESSION_DB_PATH = "sessions.db"
+# Seconds a session may sit idle before it is evicted
+SESSION_TTL = 7 * 24 * 3600
+# Seconds between background writes of coalesced saves
+FLUSH_INTERVAL = 0.5
+
+
+def new_session_token() -> str:
+    return secrets.token_urlsafe(16)
+
+
+class SessionStore(abc.ABC):
+    """Backend interface; state is a JSON-serializable dict."""
+
+    @abc.abstractmethod
+    def load(self, token):
+        """Saved state for token, or None if unknown or expired."""
+
+    @abc.abstractmethod
+    def save(self, token, state):
+        """Store state for token (may be written in the background)."""
+
+    def stats(self) -> dict:
+        return {}
+
+
+class SQLiteSessionStore(SessionStore):
+    def __init__(self, path=SESSION_DB_PATH, ttl=SESSION_TTL, flush_interval=FLUSH_INTERVAL):
+        self.ttl = ttl
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS sessions (
+                token TEXT PRIMARY KEY,
+                state TEXT NOT NULL,
+                updated_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS sessions_updated ON sessions (updated_at)")
+        # token → (state JSON, saved at) waiting for the next flush
+        self._pending = {}
+        # token → state JSON last loaded or saved here, to skip unchanged saves
+        self._last = {}
+        self._stats = {"saves": 0, "unchanged": 0, "writes": 0, "evicted": 0}
+        self._wake = threading.Event()
+        self._last_eviction = 0.0
+        threading.Thread(target=self._run, name="session-store-flush", daemon=True).start()
+
+    def load(self, token):
+        with self._lock:
+            pending = self._pending.get(token)
+            if pending is not None:
+                data = pending[0]
+            else:
+                row = self._conn.execute(
+                    "SELECT state, updated_at FROM sessions WHERE token = ?", (token,)
+                ).fetchone()
+                data = None if row is None or time.time() - row[1] > self.ttl else row[0]
+            # Dedup against what is stored now, not this process's last save,
+            # which another worker may have overwritten since
+            if data is None:
+                self._last.pop(token, None)
+            else:
+                self._last[token] = data
+        return None if data is None else json.loads(data)
+
+    def save(self, token, state):
+        data = json.dumps(state, sort_keys=True)
+        with self._lock:
+            self._stats["saves"] += 1
+            if self._last.get(token) == data:
+                self._stats["unchanged"] += 1
+                return
+            self._last[token] = data
+            self._pending[token] = (data, time.time())
+        self._wake.set()
+
+    def flush(self):
+        """Write all coalesced saves in one transaction."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            if not pending:
+                return
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany(
+                    "INSERT INTO sessions (token, state, updated_at) VALUES (?, ?, ?) "
+                    "ON CONFLICT(token) DO UPDATE SET state = excluded.state, updated_at = excluded.updated_at",
+                    [(token, data, saved_at) for token, (data, saved_at) in pending.items()],
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                # Keep them for the next flush unless a newer save came in
+                for token, entry in pending.items():
+                    self._pending.setdefault(token, entry)
+                raise
+            self._stats["writes"] += len(pending)
+        metrics.inc("session_store_writes", len(pending))
+
+    def evict_expired(self) -> int:
+        cutoff = time.time() - self.ttl
+        with self._lock:
+            evicted = self._conn.execute("DELETE FROM sessions WHERE updated_at < ?", (cutoff,)).rowcount
+            # Forget dedup entries too, or the memo would grow with every session ever seen
+            if len(self._last) > 10000:
+                self._last.clear()
+            self._stats["evicted"] += evicted
+        return evicted
+
+    def _run(self):
+        while True:
+            self._wake.wait()
+            # Let saves from the same rerun (and nearby reruns) pile up first
+            time.sleep(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+                if time.time() - self._last_eviction > 3600:
+                    self._last_eviction = time.time()
+                    self.evict_expired()
+            except sqlite3.Error:
+                metrics.inc("session_store_errors")
+                self._wake.set()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._stats, pending=len(self._pending))
+
+
+_store_lock = threading.Lock()
+_store = None
+
+
+def set_session_store(store):
+    """Install another backend (or a local stand-in for tests)."""
+    global _store
+    with _store_lock:
+        _store = store
+
+
+def get_session_store() -> SessionStore:
+    """The process-wide store, SQLite at SESSION_DB_PATH unless one was set."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = SQLiteSessionStore()
+            store = _store
+            metrics.register_collector(
+                lambda: {f"session_store_{name}": value for name, value in store.stats().items()}
+            )
+        return _store
@@ -0,0 +1,106 @@
+"""
+Process-wide pool for the authorized gspread client and worksheet handles.
+
+Authorizing and resolving a spreadsheet by name (a Drive search) is done once
+per process; later calls reuse the client and the worksheet cached by
+spreadsheet key. The access token is refreshed ahead of expiry so requests
+don't stall on an inline refresh, and a client whose refresh fails is rebuilt.
+"""
+import datetime
+import threading
+
+import gspread
+
+import metrics
+
+
+class SheetPool:
+    def __init__(self, credentials_factory, refresh_margin=300):
+        """
+        credentials_factory: returns fresh service-account credentials
+        refresh_margin: seconds before token expiry to refresh proactively
+        """
+        self.credentials_factory = credentials_factory
+        self.refresh_margin = datetime.timedelta(seconds=refresh_margin)
+        self._lock = threading.RLock()
+        self._client = None
+        # spreadsheet name → key, key → first worksheet
+        self._keys = {}
+        self._worksheets = {}
+        self._stats = {"connects": 0, "reconnects": 0, "token_refreshes": 0, "hits": 0}
+
+    def _connect(self):
+        if self._client is not None:
+            self._stats["reconnects"] += 1
+        self._stats["connects"] += 1
+        self._client = gspread.authorize(self.credentials_factory())
+        self._worksheets.clear()
+
+    def _refresh_if_needed(self):
+        from google.auth.transport.requests import Request
+
+        auth = self._client.http_client.auth
+        expiry = getattr(auth, "expiry", None)
+        # google-auth keeps expiry as a naive UTC datetime
+        now = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+        if auth.token is not None and expiry is not None and expiry - now > self.refresh_margin:
+            return
+        auth.refresh(Request())
+        self._stats["token_refreshes"] += 1
+
+    def client(self) -> gspread.Client:
+        with self._lock:
+            if self._client is None:
+                self._connect()
+            try:
+                self._refresh_if_needed()
+            except Exception:
+                # Credentials can no longer be refreshed: start over with new ones
+                self._connect()
+                self._refresh_if_needed()
+            return self._client
+
+    def worksheet(self, sheet_name=None, key=None) -> gspread.Worksheet:
+        """First worksheet of a spreadsheet, by key or (resolved once) by name."""
+        with self._lock:
+            client = self.client()
+            if key is None:
+                key = self._keys.get(sheet_name)
+                if key is None:
+                    spreadsheet = client.open(sheet_name)
+                    key = self._keys[sheet_name] = spreadsheet.id
+                    sheet = self._worksheets[key] = spreadsheet.sheet1
+                    return sheet
+            sheet = self._worksheets.get(key)
+            if sheet is None:
+                sheet = self._worksheets[key] = client.open_by_key(key).sheet1
+            else:
+                self._stats["hits"] += 1
+            return sheet
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._stats)
+
+
+_pool_lock = threading.Lock()
+_pool = None
+
+
+def set_pool(pool):
+    """Replace the process-wide pool, e.g. with a local stand-in for load tests."""
+    global _pool
+    with _pool_lock:
+        _pool = pool
+
+
+def get_pool(credentials_factory) -> SheetPool:
+    """The process-wide pool; credentials_factory is only used on first call."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = SheetPool(credentials_factory)
+            metrics.register_collector(
+                lambda: {f"sheets_pool_{name}": value for name, value in _pool.stats().items()}
+            )
+        return _pool
@@ -0,0 +1,365 @@
+"""
+Write-behind queue for Google Sheets submissions.
+
+Rows are first committed to a local SQLite (WAL) spool so the Streamlit page
+returns immediately; a background thread batches pending rows into
+append_rows() calls, backing off when Sheets rate-limits us.
+
+Each row is sent with its spool submission id as an extra trailing column.
+Rows that were in flight when their process died, or whose write failed in a
+way that may still have been applied (5xx, timeouts), are reconciled against
+that column before anything else is sent, so a row is written exactly once.
+Several processes may share one spool: a claim records its owner and a
+lease, and only rows whose owner is gone or whose lease ran out are
+reconciled by another process.
+
+Rows queued with an upsert key replace the sheet row whose first column
+matches the key instead of being appended.
+"""
+import json
+import os
+import random
+import re
+import sqlite3
+import threading
+import time
+import uuid
+
+import metrics
+
+SPOOL_PATH = "submissions.db"
+
+PENDING, INFLIGHT, SENT = "pending", "inflight", "sent"
+
+# Sheet column holding the submission id (after ProlificID, device, decision, working)
+ID_COLUMN = 5
+# Seconds a claim stays with its process; after that (or once the process is
+# gone) another flusher may reconcile the row. Longer than any Sheets request.
+LEASE_SECONDS = 300
+
+
+def _pid_alive(pid):
+    """False if the process that claimed a row is known to be gone."""
+    if pid is None:
+        return False  # claimed before owners were recorded
+    if os.name != "posix":
+        return True  # can't tell here; the lease decides
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class SubmissionSpool:
+    """Durable, thread-safe local queue of rows waiting to reach the sheet."""
+
+    def __init__(self, path=SPOOL_PATH, lease=LEASE_SECONDS):
+        self.lease = lease
+        # Identifies this spool's claims among every process sharing the file
+        self.owner = f"{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=FULL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS submissions (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                submission_id TEXT UNIQUE NOT NULL,
+                row TEXT NOT NULL,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                created_at REAL NOT NULL,
+                sent_at REAL,
+                upsert_key TEXT,
+                owner TEXT,
+                owner_pid INTEGER,
+                lease_until REAL
+            )
+            """
+        )
+        columns = [info[1] for info in self._conn.execute("PRAGMA table_info(submissions)")]
+        for name, kind in (("upsert_key", "TEXT"), ("owner", "TEXT"), ("owner_pid", "INTEGER"), ("lease_until", "REAL")):
+            if name not in columns:
+                self._conn.execute(f"ALTER TABLE submissions ADD COLUMN {name} {kind}")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS submissions_status ON submissions (status, seq)")
+
+    def enqueue(self, row, upsert_key=None) -> str:
+        submission_id = uuid.uuid4().hex
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO submissions (submission_id, row, status, created_at, upsert_key) VALUES (?, ?, ?, ?, ?)",
+                (submission_id, json.dumps(list(row)), PENDING, time.time(), upsert_key),
+            )
+        return submission_id
+
+    def claim(self, limit):
+        """Mark up to `limit` pending rows in flight and return [(submission_id, row, upsert_key)]."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self._conn.execute(
+                    "SELECT submission_id, row, upsert_key FROM submissions WHERE status = ? ORDER BY seq LIMIT ?",
+                    (PENDING, limit),
+                ).fetchall()
+                lease_until = time.time() + self.lease
+                self._conn.executemany(
+                    "UPDATE submissions SET status = ?, attempts = attempts + 1, owner = ?, owner_pid = ?, "
+                    "lease_until = ? WHERE submission_id = ?",
+                    [(INFLIGHT, self.owner, os.getpid(), lease_until, submission_id) for submission_id, _, _ in rows],
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return [(submission_id, json.loads(row), upsert_key) for submission_id, row, upsert_key in rows]
+
+    def _set_status(self, submission_ids, status, sent_at=None):
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE submissions SET status = ?, sent_at = ? WHERE submission_id = ?",
+                [(status, sent_at, submission_id) for submission_id in submission_ids],
+            )
+
+    def mark_sent(self, submission_ids):
+        self._set_status(submission_ids, SENT, time.time())
+
+    def release(self, submission_ids):
+        """Put in-flight rows back in the queue after a failed append."""
+        self._set_status(submission_ids, PENDING)
+
+    def inflight(self):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT submission_id FROM submissions WHERE status = ?", (INFLIGHT,)
+            ).fetchall()
+        return [submission_id for (submission_id,) in rows]
+
+    def adopt(self):
+        """
+        Take over in-flight rows that need reconciling and return their ids:
+        this spool's own (left by an ambiguous failure) and those whose owner
+        died or whose lease expired. Rows another live process is still
+        sending are left alone.
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self._conn.execute(
+                    "SELECT submission_id, owner, owner_pid, lease_until FROM submissions WHERE status = ?",
+                    (INFLIGHT,),
+                ).fetchall()
+                adopted = [
+                    submission_id
+                    for submission_id, owner, owner_pid, lease_until in rows
+                    if owner == self.owner or (lease_until or 0) < now or not _pid_alive(owner_pid)
+                ]
+                self._conn.executemany(
+                    "UPDATE submissions SET owner = ?, owner_pid = ?, lease_until = ? WHERE submission_id = ?",
+                    [(self.owner, os.getpid(), now + self.lease, submission_id) for submission_id in adopted],
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return adopted
+
+    def counts(self) -> dict:
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM submissions GROUP BY status").fetchall()
+        counts = {PENDING: 0, INFLIGHT: 0, SENT: 0}
+        counts.update(dict(rows))
+        return counts
+
+
+def _is_rate_limit(exc):
+    code = _status_code(exc)
+    return code == 429 or (code is not None and code >= 500)
+
+
+def _status_code(exc):
+    code = getattr(exc, "code", None)
+    if code is None:
+        code = getattr(getattr(exc, "response", None), "status_code", None)
+    return code if isinstance(code, int) else None
+
+
+def _not_applied(exc):
+    """
+    True if the request surely did not reach the sheet (429 and other 4xx
+    rejections). 5xx, timeouts and connection errors may have been applied
+    before the response was lost.
+    """
+    code = _status_code(exc)
+    return code is not None and 400 <= code < 500 and code != 408
+
+
+def _retry_after(exc):
+    headers = getattr(getattr(exc, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return None
+
+
+class SheetFlusher(threading.Thread):
+    """
+    Background thread draining a SubmissionSpool into a worksheet.
+
+    get_sheet is called on the flusher thread whenever a worksheet handle is
+    needed, so slow auth never blocks a page render.
+    """
+
+    def __init__(self, spool, get_sheet, batch_size=100, interval=2.0, max_backoff=64.0):
+        super().__init__(name="sheet-flusher", daemon=True)
+        self.spool = spool
+        self.get_sheet = get_sheet
+        self.batch_size = batch_size
+        self.interval = interval
+        self.max_backoff = max_backoff
+        self.stats = {"batches": 0, "rows_sent": 0, "upserts": 0, "failures": 0, "rate_limited": 0}
+        self._wake = threading.Event()
+        self._failures_in_a_row = 0
+
+    def notify(self):
+        self._wake.set()
+
+    def _reconcile(self, sheet):
+        """
+        Resolve rows left in flight by a dead process, an expired lease or an
+        ambiguous failure: sent if their id is in the sheet, else pending again.
+        """
+        adopted = self.spool.adopt()
+        if adopted:
+            present = set(sheet.col_values(ID_COLUMN))
+            self.spool.mark_sent([i for i in adopted if i in present])
+            self.spool.release([i for i in adopted if i not in present])
+
+    def flush_once(self) -> int:
+        """Send one batch; returns the number of rows appended."""
+        sheet = self.get_sheet()
+        # Cheap local check; the sheet is only read when something was adopted
+        self._reconcile(sheet)
+        batch = self.spool.claim(self.batch_size)
+        if not batch:
+            return 0
+        appends = [(submission_id, row) for submission_id, row, key in batch if key is None]
+        upserts = [(submission_id, row, key) for submission_id, row, key in batch if key is not None]
+        ids = [submission_id for submission_id, _ in appends]
+        try:
+            if appends:
+                with metrics.span("sheets_append_rows"):
+                    sheet.append_rows([row + [submission_id] for submission_id, row in appends])
+        except Exception as exc:
+            self._failed(exc, ids)
+            self.spool.release([submission_id for submission_id, _, _ in upserts])
+            metrics.inc("sheet_submission_retries", len(batch))
+            raise
+        self.spool.mark_sent(ids)
+        metrics.inc("sheet_submissions", len(ids), result="appended")
+        self.stats["batches"] += 1
+        self.stats["rows_sent"] += len(ids)
+
+        for n, (submission_id, row, key) in enumerate(upserts):
+            try:
+                with metrics.span("sheets_upsert_row"):
+                    self._upsert(sheet, submission_id, row, key)
+            except Exception as exc:
+                self._failed(exc, [submission_id])
+                self.spool.release([i for i, _, _ in upserts[n + 1:]])
+                metrics.inc("sheet_submission_retries", len(upserts) - n)
+                raise
+            self.spool.mark_sent([submission_id])
+            metrics.inc("sheet_submissions", result="upserted")
+            self.stats["upserts"] += 1
+        return len(batch)
+
+    def _failed(self, exc, submission_ids):
+        """
+        Rows whose write failed: back to pending if the sheet surely did not
+        apply it, else left in flight (still ours) and checked against the id
+        column before the next send, so an applied write is never repeated.
+        """
+        if _not_applied(exc):
+            self.spool.release(submission_ids)
+
+    def _upsert(self, sheet, submission_id, row, key):
+        # Only duplicates take this path, so the remote search stays off the common case
+        pattern = re.compile(rf"^\s*{re.escape(key)}\s*$", re.IGNORECASE)
+        cell = sheet.find(pattern, in_column=1)
+        values = row + [submission_id]
+        if cell is None:
+            sheet.append_rows([values])
+        else:
+            sheet.update([values], f"A{cell.row}:{chr(ord('A') + len(values) - 1)}{cell.row}")
+
+    def _backoff(self, exc):
+        self._failures_in_a_row += 1
+        delay = min(self.max_backoff, self.interval * 2 ** self._failures_in_a_row)
+        delay *= random.uniform(0.5, 1.0)
+        return max(delay, _retry_after(exc) or 0)
+
+    def run(self):
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            try:
+                # Drain everything pending before sleeping again
+                while self.flush_once() == self.batch_size:
+                    pass
+                self._failures_in_a_row = 0
+            except Exception as exc:
+                self.stats["failures"] += 1
+                if _is_rate_limit(exc):
+                    self.stats["rate_limited"] += 1
+                metrics.inc("sheet_flush_failures", reason="rate_limited" if _is_rate_limit(exc) else "error")
+                time.sleep(self._backoff(exc))
+
+
+_queue_lock = threading.Lock()
+_spool = None
+_flusher = None
+
+
+def start_flusher(get_sheet, spool_path=SPOOL_PATH):
+    """
+    Open the spool and start the process-wide flusher thread (idempotent).
+    Rows left over from a previous run are sent as soon as it starts.
+    """
+    global _spool, _flusher
+    with _queue_lock:
+        if _spool is None:
+            _spool = SubmissionSpool(spool_path)
+        if _flusher is None:
+            _flusher = SheetFlusher(_spool, get_sheet)
+            _flusher.start()
+            _flusher.notify()
+            metrics.register_collector(
+                lambda: {f"submission_queue_{name}": value for name, value in get_queue_stats().items()}
+            )
+
+
+def submit_row(row, upsert_key=None) -> str:
+    """
+    Durably queue a row for the sheet and return its submission id.
+    With upsert_key, the row replaces the one whose first column matches it.
+    """
+    if _spool is None:
+        raise RuntimeError("start_flusher() must be called before submit_row()")
+    submission_id = _spool.enqueue(row, upsert_key)
+    metrics.inc("sheet_submissions_queued")
+    _flusher.notify()
+    return submission_id
+
+
+def get_queue_stats() -> dict:
+    with _queue_lock:
+        if _spool is None:
+            return {}
+        stats = dict(_flusher.stats)
+        stats.update(_spool.counts())
+        return stats
@@ -0,0 +1,49 @@
+import sellcell_data
+from price_history import PriceHistory
+
+NAN = float("nan")
+DEVICE = "Pixel 8 128GB"
+
+
+def _table(price):
+    """One-device, one-condition catalog; price None leaves the device out."""
+    names = [] if price is None else [DEVICE]
+    values = [] if price is None else [float(price), NAN, NAN]
+    return sellcell_data.CatalogTable(
+        ["Google"], ["Mint"], [0] * len(names), names, [NAN] * len(names), [2023] * len(names),
+        values, [float(price)] * len(names) if names else [],
+    )
+
+
+def test_backfill_keeps_later_snapshots(tmp_path):
+    history = PriceHistory(str(tmp_path / "history.db"))
+    history.ingest_table(_table(100), "a", "2025-01-01")
+    history.ingest_table(_table(100), "c", "2025-03-01")  # deduplicated against A
+    history.ingest_table(_table(90), "b", "2025-02-01")  # backfilled between them
+
+    assert history.price(DEVICE, "Mint", "2025-01-15") == 100
+    assert history.price(DEVICE, "Mint", "2025-02-15") == 90
+    assert history.price(DEVICE, "Mint", "2025-03-15") == 100
+    assert history.series(DEVICE, "Mint") == [("2025-01-01", 100), ("2025-02-01", 90), ("2025-03-01", 100)]
+
+
+def test_backfill_keeps_later_removal_and_absence(tmp_path):
+    history = PriceHistory(str(tmp_path / "history.db"))
+    history.ingest_table(_table(100), "a", "2025-01-01")
+    history.ingest_table(_table(None), "c", "2025-03-01")  # device dropped
+    history.ingest_table(_table(90), "b", "2025-02-01")
+    assert history.price(DEVICE, "Mint", "2025-03-15") is None
+
+    # A device first seen in a backfilled export is still absent from the later one
+    other = PriceHistory(str(tmp_path / "other.db"))
+    other.ingest_table(_table(None), "c", "2025-03-01")
+    other.ingest_table(_table(90), "b", "2025-02-01")
+    assert other.price(DEVICE, "Mint", "2025-02-15") == 90
+    assert other.price(DEVICE, "Mint", "2025-03-15") is None
+
+
+def test_unchanged_rows_are_deduplicated(tmp_path):
+    history = PriceHistory(str(tmp_path / "history.db"))
+    assert history.ingest_table(_table(100), "a", "2025-01-01") == 1
+    assert history.ingest_table(_table(100), "b", "2025-02-01") == 0
+    assert history.ingest_table(_table(100), "b", "2025-02-01") == 0
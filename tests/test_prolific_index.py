@@ -0,0 +1,23 @@
+from prolific_index import ProlificIndex
+
+
+def test_add_reserves_once_across_workers(tmp_path):
+    path = str(tmp_path / "prolific_ids.db")
+    first, second = ProlificIndex(path, None), ProlificIndex(path, None)
+
+    assert first.add("ABC123")
+    assert not second.add(" abc123 ")
+    assert "abc123" in second
+
+    first.discard("ABC123")  # queueing failed; the participant may retry
+    assert second.add("abc123")
+
+
+def test_seed_skips_header_and_imports_legacy_csv(tmp_path):
+    legacy = tmp_path / "prolific_ids.csv"
+    legacy.write_text("prolific_id,first_seen\nold1,0\n")
+    index = ProlificIndex(str(tmp_path / "prolific_ids.db"), str(legacy))
+
+    assert index.seed(["ProlificID", "old1", "new1", " "]) == 1
+    assert "old1" in index and "new1" in index
+    assert "prolificid" not in index
@@ -0,0 +1,65 @@
+import math
+import os
+import shutil
+
+import openpyxl
+import pytest
+
+import sellcell_data
+import sellcell_snapshot
+
+WORKBOOK = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "SellCell.xlsx")
+
+
+@pytest.fixture
+def workbook(tmp_path, monkeypatch):
+    path = str(tmp_path / "SellCell.xlsx")
+    shutil.copy(WORKBOOK, path)
+    monkeypatch.setattr(sellcell_data, "EXCEL_PATH", path)
+    monkeypatch.setattr(sellcell_data, "SNAPSHOT_PATH", str(tmp_path / "SellCell.snapshot"))
+    monkeypatch.setattr(sellcell_data, "_catalog", None)
+    monkeypatch.setattr(sellcell_data, "_stats", dict.fromkeys(sellcell_data._stats, 0))
+    return path
+
+
+def _columns(table):
+    def plain(column):
+        return [None if isinstance(v, float) and math.isnan(v) else v for v in column]
+
+    return {
+        "brands": list(table.brands),
+        "conditions": list(table.conditions),
+        "rows": [
+            (table.brands[table.brand_idx[i]], name)
+            for i, name in enumerate(table.names)
+        ],
+        "msrp": plain(table.msrp),
+        "launch_year": list(table.launch_year),
+        "values": plain(table.values),
+        "max_price": plain(table.max_price),
+    }
+
+
+def _edit_apple(path):
+    """Change a Mint price and add a device, in the Apple sheet only."""
+    wb = openpyxl.load_workbook(path)
+    ws = wb["Apple"]
+    ws.cell(row=3, column=4, value=ws.cell(row=3, column=4).value + 10)
+    ws.append(["iPhone Test 64GB", 2024, 499, 300])
+    wb.save(path)
+
+
+@pytest.mark.parametrize("from_snapshot", [False, True])
+def test_reload_reparses_only_the_edited_sheet(workbook, from_snapshot):
+    if from_snapshot:
+        sellcell_snapshot.build_snapshot(workbook, sellcell_data.SNAPSHOT_PATH)
+    assert sellcell_data.reload_catalog()
+    assert sellcell_data._stats["snapshot_loads"] == int(from_snapshot)
+
+    _edit_apple(workbook)
+    assert sellcell_data.reload_catalog()
+
+    assert sellcell_data._stats["incremental_reloads"] == 1
+    assert sellcell_data._stats["sheets_reparsed"] == 1
+    assert _columns(sellcell_data._catalog.table) == _columns(sellcell_data.read_excel_table(workbook))
+    assert sellcell_data.get_sellcell_price("iPhone Test 64GB", "Mint")["price"] == 300
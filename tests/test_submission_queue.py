@@ -0,0 +1,122 @@
+import threading
+
+import pytest
+
+from submission_queue import ID_COLUMN, SheetFlusher, SubmissionSpool
+
+
+class SheetError(Exception):
+    def __init__(self, code):
+        super().__init__(code)
+        self.code = code
+
+
+class FakeSheet:
+    """append_rows can fail before or after applying the write, or block until released."""
+
+    def __init__(self):
+        self.rows = []
+        self.fail_before = None
+        self.fail_after = None
+        self.started = threading.Event()
+        self.proceed = None
+
+    def append_rows(self, rows, **kwargs):
+        self.started.set()
+        if self.proceed is not None:
+            self.proceed.wait(5)
+        if self.fail_before is not None:
+            exc, self.fail_before = self.fail_before, None
+            raise exc
+        self.rows.extend(list(row) for row in rows)
+        if self.fail_after is not None:
+            exc, self.fail_after = self.fail_after, None
+            raise exc
+
+    def col_values(self, col):
+        return [row[col - 1] for row in self.rows]
+
+
+def _spool(tmp_path, **kwargs):
+    return SubmissionSpool(str(tmp_path / "submissions.db"), **kwargs)
+
+
+def _ids(sheet):
+    return sheet.col_values(ID_COLUMN)
+
+
+def _enqueue(spool, n):
+    return [spool.enqueue([f"pid{i}", "Pixel 8", "Resell", "Yes"]) for i in range(n)]
+
+
+def test_ambiguous_failure_is_reconciled_not_resent(tmp_path):
+    spool, sheet = _spool(tmp_path), FakeSheet()
+    flusher = SheetFlusher(spool, lambda: sheet)
+    ids = _enqueue(spool, 2)
+    sheet.fail_after = SheetError(503)  # applied, then the response was lost
+
+    with pytest.raises(SheetError):
+        flusher.flush_once()
+    assert spool.counts()["inflight"] == 2
+
+    flusher.flush_once()
+    assert _ids(sheet) == ids
+    assert spool.counts() == {"pending": 0, "inflight": 0, "sent": 2}
+
+
+def test_ambiguous_failure_not_applied_is_resent_once(tmp_path):
+    spool, sheet = _spool(tmp_path), FakeSheet()
+    flusher = SheetFlusher(spool, lambda: sheet)
+    ids = _enqueue(spool, 2)
+    sheet.fail_before = SheetError(503)
+
+    with pytest.raises(SheetError):
+        flusher.flush_once()
+    flusher.flush_once()  # reconcile releases them, then they are sent
+    assert _ids(sheet) == ids
+    assert spool.counts()["sent"] == 2
+
+
+def test_rate_limit_releases_rows_immediately(tmp_path):
+    spool, sheet = _spool(tmp_path), FakeSheet()
+    flusher = SheetFlusher(spool, lambda: sheet)
+    ids = _enqueue(spool, 1)
+    sheet.fail_before = SheetError(429)
+
+    with pytest.raises(SheetError):
+        flusher.flush_once()
+    assert spool.counts()["pending"] == 1
+    flusher.flush_once()
+    assert _ids(sheet) == ids
+
+
+def test_shared_spool_leaves_live_claims_alone(tmp_path):
+    sheet = FakeSheet()
+    sheet.proceed = threading.Event()
+    first = SheetFlusher(_spool(tmp_path), lambda: sheet)
+    second = SheetFlusher(_spool(tmp_path), lambda: sheet)
+    ids = _enqueue(first.spool, 3)
+
+    sending = threading.Thread(target=first.flush_once)
+    sending.start()
+    assert sheet.started.wait(5)
+    # Another worker (or the next process in a rolling restart) starts meanwhile
+    assert second.flush_once() == 0
+    sheet.proceed.set()
+    sending.join(5)
+
+    assert _ids(sheet) == ids
+    assert first.spool.counts() == {"pending": 0, "inflight": 0, "sent": 3}
+
+
+def test_expired_claims_are_reconciled_by_another_process(tmp_path):
+    sheet = FakeSheet()
+    crashed = _spool(tmp_path, lease=0)
+    ids = _enqueue(crashed, 3)
+    claimed = crashed.claim(2)
+    # The first claim reached the sheet before its process went away
+    sheet.append_rows([row + [submission_id] for submission_id, row, _ in claimed[:1]])
+
+    SheetFlusher(_spool(tmp_path), lambda: sheet).flush_once()
+    assert sorted(_ids(sheet)) == sorted(ids)
+    assert len(_ids(sheet)) == 3